@@ -1,5 +1,6 @@
 import streamlit as st
 import database
+import recommender
 import views
 
 # --- SETUP ---
@@ -7,17 +8,25 @@ import views
 st.set_page_config(page_title="Meetly", page_icon="👋", layout="wide")
 
 # Initialize the database (create tables if they don't exist).
-# This ensures that 'users' and 'saved_events' tables exist before the app tries to access them. 
+# This ensures that the 'users', 'saved_events' and event catalog tables exist before the app tries to access them. 
 database.init_db()
 
+# Keep ranked recommendation results in the database as well, so repeated searches survive restarts.
+recommender.RESULT_CACHE.persistent = True
+
 # --- SESSION STATE INITIALIZATION ---
 # Session state is crucial in Streamlit persisting data across user interactions
 # (e.g., button clicks, widget changes) that trigger application reruns. 
 
-# 'ranked_results' stores the final, scored list of recommended events from the engine.
+# 'ranked_results' stores the final, scored recommended events from the engine (grouped by week).
 if 'ranked_results' not in st.session_state:
     st.session_state.ranked_results = None # Initially none, unitl the recommendation process runs 
 
+# 'recommendation_session' caches the per-user availability and interest data of the last search,
+# so the results can be re-ranked instantly when the selected group changes.
+if 'recommendation_session' not in st.session_state:
+    st.session_state.recommendation_session = None
+
 # 'selected_events' stores events the user has chosen to add to the group calendar.
 if 'selected_events' not in st.session_state:
     st.session_state.selected_events = []
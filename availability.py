@@ -0,0 +1,451 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_SECOND = timedelta(seconds=1)
+
+
+# --- Time conversion helpers ---
+
+def to_epoch(value):
+    """
+    Converts a single datetime (or pandas Timestamp) into an int64 epoch value in microseconds.
+    Timezone info is dropped first (the wall-clock time is kept), exactly like the
+    availability check did with .replace(tzinfo=None).
+    """
+    if isinstance(value, datetime):
+        # Plain datetime arithmetic is much faster than going through numpy for single values
+        return (value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    return int(np.datetime64(pd.Timestamp(value).replace(tzinfo=None), 'us').astype(np.int64))
+
+
+def from_epoch(value):
+    """
+    Converts an epoch value in microseconds back into a (timezone-naive) datetime.
+    """
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def series_to_epoch(values):
+    """
+    Converts a column (or list) of datetimes into an int64 numpy array of epoch microseconds,
+    dropping any timezone info while keeping the wall-clock time.
+    """
+    values = pd.to_datetime(pd.Series(values))
+    if values.dt.tz is not None:
+        values = values.dt.tz_localize(None)
+    return values.to_numpy(dtype='datetime64[us]').astype(np.int64)
+
+
+# --- Compact busy slot storage ---
+
+# Offset marker for naive datetimes (e.g., all-day events), which have no UTC offset
+_NO_OFFSET = -(2 ** 31)
+
+
+def _offset_tz(offset):
+    """
+    Returns the fixed-offset timezone for a stored UTC offset in seconds (None for naive datetimes).
+    """
+    return None if offset == _NO_OFFSET else timezone(timedelta(seconds=offset))
+
+
+class BusySlots:
+    """
+    Compact list of one user's busy slots, used as the values of a user_busy_map.
+    Instead of one dictionary per slot, the slots are kept in parallel typed arrays:
+    wall-clock start/end as int64 epoch microseconds, their UTC offsets in seconds (they differ for
+    events across a daylight saving change) and the
+    position of the summary in a table of distinct summaries (recurring titles are stored once).
+    Iterating (or indexing) still yields {'summary', 'start', 'end'} dictionaries, so code written
+    for lists of slot dictionaries (e.g., the group calendar) keeps working unchanged.
+    """
+
+    __slots__ = ('_starts', '_ends', '_start_offsets', '_end_offsets', '_summary_ids', '_summaries',
+                 '_summary_ids_by_text')
+
+    def __init__(self, slots=()):
+        """
+        Args:
+            slots (iterable): Optional slot dictionaries ({'summary', 'start', 'end'}) to add.
+        """
+        self._starts = array('q')
+        self._ends = array('q')
+        self._start_offsets = array('i')
+        self._end_offsets = array('i')
+        self._summary_ids = array('i')
+        self._summaries = []
+        self._summary_ids_by_text = {}
+        for slot in slots:
+            self.append(slot)
+
+    def add(self, summary, start, end):
+        """
+        Adds one busy slot (start/end are datetimes, timezone-aware or naive).
+        """
+        summary_id = self._summary_ids_by_text.get(summary)
+        if summary_id is None:
+            summary_id = len(self._summaries)
+            self._summaries.append(summary)
+            self._summary_ids_by_text[summary] = summary_id
+        start_offset = start.utcoffset()
+        end_offset = end.utcoffset()
+        # Same conversion as to_epoch (wall-clock time), inlined because producers call this per event
+        self._starts.append((start.replace(tzinfo=None) - _EPOCH) // _MICROSECOND)
+        self._ends.append((end.replace(tzinfo=None) - _EPOCH) // _MICROSECOND)
+        self._start_offsets.append(_NO_OFFSET if start_offset is None else start_offset // _SECOND)
+        self._end_offsets.append(_NO_OFFSET if end_offset is None else end_offset // _SECOND)
+        self._summary_ids.append(summary_id)
+
+    def append(self, slot):
+        """
+        Adds a slot dictionary, like list.append for the old list-of-dictionaries format.
+        """
+        self.add(slot.get('summary', ''), slot['start'], slot['end'])
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __bool__(self):
+        return len(self._starts) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return {
+            'summary': self._summaries[self._summary_ids[i]],
+            'start': from_epoch(self._starts[i]).replace(tzinfo=_offset_tz(self._start_offsets[i])),
+            'end': from_epoch(self._ends[i]).replace(tzinfo=_offset_tz(self._end_offsets[i])),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"BusySlots({len(self)} slots, {len(self._summaries)} distinct summaries)"
+
+    @property
+    def starts(self):
+        """
+        Wall-clock start times as an int64 array of epoch microseconds (a copy).
+        """
+        return np.frombuffer(self._starts, dtype=np.int64).copy()
+
+    @property
+    def ends(self):
+        """
+        Wall-clock end times as an int64 array of epoch microseconds (a copy).
+        """
+        return np.frombuffer(self._ends, dtype=np.int64).copy()
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory of the slot arrays and the distinct summaries in bytes.
+        """
+        arrays = (self._starts, self._ends, self._start_offsets, self._end_offsets, self._summary_ids)
+        return sum(a.itemsize * len(a) for a in arrays) + sum(len(text) for text in self._summaries)
+
+    def is_free(self, event_start, event_end):
+        """
+        Returns True if no busy slot overlaps the event (one vectorized overlap check over all slots).
+        """
+        if not self:
+            return True
+        start = to_epoch(event_start)
+        end = to_epoch(event_end)
+        starts = np.frombuffer(self._starts, dtype=np.int64)
+        ends = np.frombuffer(self._ends, dtype=np.int64)
+        return not bool(np.any((start < ends) & (end > starts)))
+
+
+# --- Per-user interval index ---
+
+class BusyIndex:
+    """
+    Sorted, merged busy intervals of one user, stored as int64 epoch arrays.
+    Built once per search, it answers "is this interval free?" by binary search in O(log n)
+    instead of scanning the whole busy list for every candidate event.
+    """
+
+    def __init__(self, starts, ends):
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_slots(cls, busy_slots):
+        """
+        Builds the index from BusySlots or a list of busy slot dictionaries ({'start': ..., 'end': ...}).
+        """
+        if isinstance(busy_slots, BusySlots):
+            # The epoch arrays already exist, no per-slot conversion needed
+            return cls.from_arrays(busy_slots.starts, busy_slots.ends)
+        if len(busy_slots) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, empty)
+        starts = np.fromiter((to_epoch(b['start']) for b in busy_slots), dtype=np.int64, count=len(busy_slots))
+        ends = np.fromiter((to_epoch(b['end']) for b in busy_slots), dtype=np.int64, count=len(busy_slots))
+        return cls.from_arrays(starts, ends)
+
+    @classmethod
+    def from_arrays(cls, starts, ends):
+        """
+        Builds the index from unsorted start/end epoch arrays.
+        Overlapping intervals are merged so the intervals are disjoint and both arrays stay sorted.
+        Intervals that only touch are kept separate, because touching is not a conflict.
+        """
+        # Slots ending before they start can never overlap an event, so they are dropped
+        valid = ends >= starts
+        starts, ends = starts[valid], ends[valid]
+        if len(starts) == 0:
+            return cls(starts, ends)
+
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], ends[order]
+
+        # A new merged interval begins wherever a slot starts at or after everything before it has ended
+        running_end = np.maximum.accumulate(ends)
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = starts[1:] >= running_end[:-1]
+
+        merged_starts = starts[new_group]
+        merged_ends = np.maximum.reduceat(ends, np.flatnonzero(new_group))
+        return cls(merged_starts, merged_ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_free(self, event_start, event_end):
+        """
+        Returns True if no busy interval overlaps the event (event_start < busy_end and event_end > busy_start).
+        """
+        start = to_epoch(event_start)
+        end = to_epoch(event_end)
+        # The first interval that ends after the event starts is the only candidate for a conflict
+        i = np.searchsorted(self.ends, start, side='right')
+        return bool(i == len(self.starts) or self.starts[i] >= end)
+
+
+def free_mask(busy_index, event_starts, event_ends):
+    """
+    Vectorized version of BusyIndex.is_free for many events at once.
+    Takes int64 epoch arrays of event starts/ends and returns a boolean array (True = free).
+    """
+    n = len(busy_index.starts)
+    if n == 0:
+        return np.ones(len(event_starts), dtype=bool)
+    # For every event: the first busy interval that ends after the event starts
+    i = np.searchsorted(busy_index.ends, event_starts, side='right')
+    # The event is free if there is no such interval or it only starts once the event is over
+    candidate_starts = busy_index.starts[np.minimum(i, n - 1)]
+    return (i == n) | (candidate_starts >= event_ends)
+
+
+# --- Time-grid bitmap backend ---
+
+class BusyBitmap:
+    """
+    Busy time of users rasterized into a fixed-resolution time grid over a planning window.
+    Every day has its own block of uint64 words (one bit per slot, e.g. 96 slots of 15 minutes),
+    and the bitmaps of all users are stacked into one users x words matrix.
+    An event is free for a user if the AND of the event's slot mask and the user's bitmap is zero.
+    A slot counts as busy if any busy interval touches it, so this backend is conservative:
+    it can report a conflict for events that only share a partial slot with a busy interval.
+    """
+
+    def __init__(self, window_start, days, resolution_minutes=15):
+        """
+        Args:
+            window_start (date): First day of the planning window.
+            days (int): Number of days covered by the grid.
+            resolution_minutes (int): Slot length (must divide a day, e.g. 5 or 15).
+        """
+        self.origin = to_epoch(datetime.combine(window_start, datetime.min.time()))
+        self.days = days
+        self.slot_length = resolution_minutes * 60 * 1_000_000
+        self.slots_per_day = (24 * 60) // resolution_minutes
+        self.words_per_day = -(-self.slots_per_day // 64)
+        self.bits_per_day = self.words_per_day * 64
+
+    @property
+    def n_words(self):
+        return self.days * self.words_per_day
+
+    def _slot_ranges(self, starts, ends):
+        """
+        Converts epoch intervals into half-open ranges of grid slots (clipped to the window).
+        Every interval covers at least one slot, so zero-length busy points are not lost.
+        """
+        first = (np.asarray(starts) - self.origin) // self.slot_length
+        last = -((self.origin - np.asarray(ends)) // self.slot_length)
+        last = np.maximum(last, first + 1)
+        total_slots = self.days * self.slots_per_day
+        return np.clip(first, 0, total_slots), np.clip(last, 0, total_slots)
+
+    def _to_bits(self, slots):
+        """
+        Maps continuous slot numbers to bit positions (each day starts at a new word).
+        """
+        return (slots // self.slots_per_day) * self.bits_per_day + slots % self.slots_per_day
+
+    def _pack(self, busy_slots):
+        """
+        Packs a boolean slot array (days * slots_per_day) into the per-day uint64 word layout.
+        """
+        grid = np.zeros((self.days, self.bits_per_day), dtype=bool)
+        grid[:, :self.slots_per_day] = busy_slots.reshape(self.days, self.slots_per_day)
+        return np.packbits(grid.reshape(-1), bitorder='little').view(np.uint64)
+
+    def rasterize(self, busy_indexes):
+        """
+        Rasterizes the BusyIndex of every user into a users x words uint64 matrix.
+        """
+        total_slots = self.days * self.slots_per_day
+        matrix = np.zeros((len(busy_indexes), self.n_words), dtype=np.uint64)
+        for row, index in enumerate(busy_indexes):
+            if len(index) == 0:
+                continue
+            first, last = self._slot_ranges(index.starts, index.ends)
+            # Difference array: +1 where a busy interval starts, -1 where it ends
+            diff = np.zeros(total_slots + 1, dtype=np.int64)
+            np.add.at(diff, first, 1)
+            np.add.at(diff, last, -1)
+            matrix[row] = self._pack(np.cumsum(diff[:-1]) > 0)
+        return matrix
+
+    def event_masks(self, event_starts, event_ends):
+        """
+        Builds the slot mask of every event as (first word, mask words) pairs.
+        Events that cross midnight simply span words of two days.
+        """
+        first, last = self._slot_ranges(event_starts, event_ends)
+        masks = []
+        for a, b in zip(first, last):
+            if a >= b:
+                # Event outside the grid: nothing to check
+                masks.append((0, np.zeros(0, dtype=np.uint64)))
+                continue
+            slots = np.arange(a, b)
+            bits = self._to_bits(slots)
+            w0 = bits[0] // 64
+            w1 = bits[-1] // 64 + 1
+            local = np.zeros((w1 - w0) * 64, dtype=bool)
+            local[bits - w0 * 64] = True
+            masks.append((w0, np.packbits(local, bitorder='little').view(np.uint64)))
+        return masks
+
+    def free_matrix(self, masks, busy_words):
+        """
+        Computes the events x users free-matrix from the event masks and the users x words busy matrix.
+        Events that do not touch anybody's busy time are resolved with one AND against the group's OR.
+        """
+        matrix = np.ones((len(masks), len(busy_words)), dtype=bool)
+        if len(busy_words) == 0:
+            return matrix
+        anyone_busy = np.bitwise_or.reduce(busy_words, axis=0)
+        for i, (w0, mask) in enumerate(masks):
+            if len(mask) == 0:
+                continue
+            w1 = w0 + len(mask)
+            # Fast path: nobody in the group is busy during the event
+            if not (anyone_busy[w0:w1] & mask).any():
+                continue
+            matrix[i] = ~(busy_words[:, w0:w1] & mask).any(axis=1)
+        return matrix
+
+
+# --- Sweep-line search for common free time ---
+
+def sweep_free_windows(busy_indexes, window_start, window_end, min_free, blocked=None):
+    """
+    Finds the maximal intervals inside [window_start, window_end) in which at least min_free users are free
+    at every moment (who is free may change inside an interval).
+    All busy endpoints are sorted once and swept in order (O(n log n)) with a running count of free users;
+    the users who are free for a whole interval are only looked up when the interval closes.
+    Args:
+        busy_indexes (list): One BusyIndex per user (merged intervals, epoch microseconds).
+        window_start, window_end (int): The search window as epoch microseconds.
+        min_free (int): Minimum number of free users.
+        blocked (list): Optional (start, end) epoch intervals in which nobody counts as free (e.g., nights).
+    Returns:
+        list: Tuples (start, end, positions of the users free for the whole interval, fewest free users
+        at any moment), in chronological order.
+    """
+    # 1. Collect the endpoints: (time, +1 = becomes busy / -1 = becomes free, user position or -1 = blocked)
+    times, deltas, owners = [], [], []
+    sources = [(u, index.starts, index.ends) for u, index in enumerate(busy_indexes)]
+    if blocked:
+        sources.append((-1, np.array([b[0] for b in blocked], dtype=np.int64), np.array([b[1] for b in blocked], dtype=np.int64)))
+    for owner, starts, ends in sources:
+        # Only the part of each interval inside the window matters
+        inside = (ends > window_start) & (starts < window_end) & (ends > starts)
+        starts = np.maximum(starts[inside], window_start)
+        ends = np.minimum(ends[inside], window_end)
+        times.extend([starts, ends])
+        deltas.extend([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+        owners.extend([np.full(len(starts), owner, dtype=np.int64)] * 2)
+
+    if times:
+        times, deltas, owners = np.concatenate(times), np.concatenate(deltas), np.concatenate(owners)
+    else:
+        times = deltas = owners = np.empty(0, dtype=np.int64)
+    order = np.argsort(times, kind='stable')
+    times, deltas, owners = times[order].tolist(), deltas[order].tolist(), owners[order].tolist()
+
+    # 2. Sweep: between two consecutive endpoints the number of free users is constant
+    n_users = len(busy_indexes)
+    busy_count = [0] * n_users
+    free_since = np.full(n_users, window_start, dtype=np.int64)  # when each user last became free
+    busy_since = np.full(n_users, window_start, dtype=np.int64)  # when each user last became busy
+    free_count = n_users
+    blocked_count = 0
+    windows = []
+    open_start = None  # start of the current interval (None = no interval open)
+    fewest_free = 0
+
+    def close_window(end):
+        # Free for the whole interval: free since its start and not busy again before its end
+        still_free = np.array([count == 0 for count in busy_count], dtype=bool)
+        always_free = (free_since <= open_start) & (still_free | (busy_since >= end))
+        windows.append((open_start, end, tuple(np.flatnonzero(always_free).tolist()), fewest_free))
+
+    cursor = window_start
+    i = 0
+    n = len(times)
+    while cursor < window_end:
+        # Apply every endpoint at the current time before looking at the next interval
+        while i < n and times[i] <= cursor:
+            owner, delta = owners[i], deltas[i]
+            if owner < 0:
+                blocked_count += delta
+            else:
+                busy_count[owner] += delta
+                if delta > 0 and busy_count[owner] == 1:
+                    free_count -= 1
+                    busy_since[owner] = cursor
+                elif delta < 0 and busy_count[owner] == 0:
+                    free_count += 1
+                    free_since[owner] = cursor
+            i += 1
+        next_time = min(times[i], window_end) if i < n else window_end
+
+        if blocked_count == 0 and free_count >= min_free:
+            # Open a new interval or extend the current one
+            if open_start is None:
+                open_start, fewest_free = cursor, free_count
+            else:
+                fewest_free = min(fewest_free, free_count)
+        elif open_start is not None:
+            close_window(cursor)
+            open_start = None
+        cursor = next_time
+
+    if open_start is not None:
+        close_window(window_end)
+    return windows
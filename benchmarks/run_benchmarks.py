@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the recommendation pipeline.
+
+Times load_local_events (cold and cached), check_user_availability, find_best_slots_for_group, plan_horizon,
+google_service.fetch_and_map_events / fetch_busy_blocks (against a fake service) and cached load_busy_map
+on synthetic data of several sizes, and writes the results as JSON, so two versions of the code can be compared:
+
+    python benchmarks/run_benchmarks.py --sizes small medium --output before.json
+    python benchmarks/run_benchmarks.py --sizes small medium --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# The benchmarks import the app modules from the repository root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import database  # noqa: E402
+import google_service  # noqa: E402
+import recommender  # noqa: E402
+from availability import BusyIndex  # noqa: E402
+from synthetic import (make_busy_map, make_fake_service, make_preferences, make_user_names,  # noqa: E402
+                       make_weekly_catalog, write_catalog)
+
+# Problem sizes: catalog templates, users, busy slots per user and day, fake calendar events per calendar
+SIZES = {
+    'small': {'templates': 50, 'users': 4, 'slots_per_day': 2, 'calendar_events': 200},
+    'medium': {'templates': 500, 'users': 12, 'slots_per_day': 6, 'calendar_events': 1000},
+    'large': {'templates': 5000, 'users': 40, 'slots_per_day': 12, 'calendar_events': 5000},
+}
+
+# All benchmarks plan the same fixed week, so results don't depend on the day they run
+WEEK_START = date(2030, 1, 7)
+WEEK_DAYS = 7
+# Days of calendar data behind the fake Google service (the week above is the first of them)
+CALENDAR_DAYS = 56
+
+
+def time_call(func, repeats, setup=None):
+    """
+    Runs func `repeats` times (after the optional setup for every run) and returns the timings in seconds.
+    """
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(name, size, params, timings):
+    return {
+        'benchmark': name,
+        'size': size,
+        'params': params,
+        'repeats': len(timings),
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+    }
+
+
+def run_size(size, params, repeats, work_dir):
+    """
+    Runs every benchmark for one problem size and returns the list of result records.
+    """
+    results = []
+    users = make_user_names(params['users'])
+    prefs = make_preferences(users)
+    week_end = WEEK_START + timedelta(days=WEEK_DAYS - 1)
+    busy_map = make_busy_map(users, WEEK_START, WEEK_DAYS, params['slots_per_day'])
+
+    # 1. Catalog loading (spreadsheet parsing + weekly expansion)
+    catalog_path = write_catalog(make_weekly_catalog(params['templates']),
+                                 os.path.join(work_dir, f"events_{size}.xlsx"))
+
+    def drop_catalog_caches():
+        recommender.clear_catalog_cache()
+        sidecar = catalog_path + recommender.CATALOG_CACHE_SUFFIX
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+
+    def load():
+        return recommender.load_local_events(catalog_path, WEEK_START, week_end)
+
+    results.append(summarize('load_local_events[cold]', size, params, time_call(load, repeats, drop_catalog_caches)))
+    load()
+    results.append(summarize('load_local_events[cached]', size, params, time_call(load, repeats)))
+    events_df = load()
+    params = dict(params, events=len(events_df))
+
+    # 2. Availability check of every user for every event (busy slots as produced by google_service,
+    # the old list of slot dictionaries and a prebuilt BusyIndex)
+    event_times = list(zip(events_df['Start'], events_df['End']))
+    dict_busy_map = make_busy_map(users, WEEK_START, WEEK_DAYS, params['slots_per_day'], compact=False)
+
+    def index_all(busy):
+        return {user: BusyIndex.from_slots(busy[user]) for user in users}
+
+    results.append(summarize('BusyIndex.from_slots[dicts]', size, params,
+                             time_call(lambda: index_all(dict_busy_map), repeats)))
+    results.append(summarize('BusyIndex.from_slots[compact]', size, params,
+                             time_call(lambda: index_all(busy_map), repeats)))
+    busy_indexes = index_all(busy_map)
+
+    def check_all(busy):
+        for start, end in event_times:
+            for user in users:
+                recommender.check_user_availability(start, end, busy[user])
+
+    results.append(summarize('check_user_availability[slots]', size, params,
+                             time_call(lambda: check_all(busy_map), repeats)))
+    results.append(summarize('check_user_availability[dicts]', size, params,
+                             time_call(lambda: check_all(dict_busy_map), repeats)))
+    results.append(summarize('check_user_availability[index]', size, params,
+                             time_call(lambda: check_all(busy_indexes), repeats)))
+
+    # 3. Full recommendation run (the result cache is bypassed, every run rescores)
+    def recommend(top_k):
+        return recommender.find_best_slots_for_group(events_df, busy_map, users, prefs, top_k=top_k, use_cache=False)
+
+    results.append(summarize('find_best_slots_for_group[all]', size, params,
+                             time_call(lambda: recommend(None), repeats)))
+    results.append(summarize('find_best_slots_for_group[top10]', size, params,
+                             time_call(lambda: recommend(10), repeats)))
+
+    # 3b. Multi-week planning (catalog database query, one session, split by week), first page of every week
+    horizon_weeks = 4
+    horizon_busy_map = make_busy_map(users, WEEK_START, horizon_weeks * WEEK_DAYS, params['slots_per_day'])
+
+    def plan():
+        _, by_week = recommender.plan_horizon(horizon_busy_map, users, prefs, WEEK_START, weeks=horizon_weeks,
+                                              file_path=catalog_path, use_cache=False)
+        return [ranked.head(10) for ranked in by_week.values()]
+
+    plan()  # imports the catalog into the benchmark database
+    results.append(summarize(f'plan_horizon[{horizon_weeks} weeks]', size, params, time_call(plan, repeats)))
+
+    # 4. Google Calendar fetch and owner mapping (fake service, no network)
+    # over all calendar data and scoped to the planned week
+    service = make_fake_service(users, WEEK_START, CALENDAR_DAYS, params['calendar_events'])
+    calendar_end = WEEK_START + timedelta(days=CALENDAR_DAYS)
+    week_stop = WEEK_START + timedelta(days=WEEK_DAYS)
+
+    def fetch(time_max):
+        return google_service.fetch_and_map_events(service, users, time_min=WEEK_START, time_max=time_max)
+
+    def fetch_busy(time_max):
+        return google_service.fetch_busy_blocks(service, users, time_min=WEEK_START, time_max=time_max)
+
+    results.append(summarize('fetch_and_map_events', size, params, time_call(lambda: fetch(calendar_end), repeats)))
+    results.append(summarize('fetch_and_map_events[week]', size, params, time_call(lambda: fetch(week_stop), repeats)))
+    results.append(summarize('fetch_busy_blocks', size, params, time_call(lambda: fetch_busy(calendar_end), repeats)))
+
+    # 5. Busy data served from the busy-data cache (a rerun of the planner page)
+    def load_busy_map():
+        return google_service.load_busy_map(service, users, time_min=WEEK_START, time_max=week_stop,
+                                            backend="freebusy")
+
+    load_busy_map()
+    results.append(summarize('load_busy_map[cached]', size, params, time_call(load_busy_map, repeats)))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(baseline, current):
+    """
+    Prints the median time of every benchmark in both result files and the ratio (current / baseline).
+    """
+    previous = {(r['benchmark'], r['size']): r for r in baseline['results']}
+    print(f"{'benchmark':40} {'size':8} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for record in current['results']:
+        old = previous.get((record['benchmark'], record['size']))
+        if old is None:
+            continue
+        ratio = record['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        print(f"{record['benchmark']:40} {record['size']:8} {old['median_s']:12.6f} {record['median_s']:12.6f} {ratio:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Meetly recommendation pipeline.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=['small', 'medium'])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="JSON result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier JSON result file to compare against")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeats': args.repeats,
+        },
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        # The catalog database of plan_horizon lives in the temporary directory, not in the app's database
+        database.DB_PATH = os.path.join(work_dir, "benchmark.sqlite")
+        database.init_db()
+        for size in args.sizes:
+            print(f"Running '{size}' benchmarks...")
+            report['results'].extend(run_size(size, SIZES[size], args.repeats, work_dir))
+
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                         f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as result_file:
+        json.dump(report, result_file, indent=2)
+    print(f"Results written to {output}")
+
+    for record in report['results']:
+        print(f"{record['benchmark']:40} {record['size']:8} median {record['median_s']:.6f}s")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            compare(json.load(baseline_file), report)
+
+
+if __name__ == "__main__":
+    main()
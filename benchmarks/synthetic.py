@@ -0,0 +1,228 @@
+"""
+Synthetic data for the benchmarks: event catalogs in the events.xlsx schema,
+busy maps of configurable density and a fake Google Calendar service.
+All generators are seeded, so every run (and every version of the code) sees the same data.
+"""
+import random
+from datetime import datetime, time, timedelta, timezone
+
+import pandas as pd
+
+from availability import BusySlots
+
+CATEGORIES = ["Sport", "Culture", "Music", "Food", "Party", "Outdoor", "Education", "Games"]
+WORDS = ["open", "air", "night", "festival", "workshop", "tour", "concert", "tasting", "league", "jam",
+         "exhibition", "market", "quiz", "yoga", "hike", "cinema", "theater", "dance", "lecture", "club"]
+LOCATIONS = ["Old Town", "Art Museum", "City Park", "Stadium", "Harbour", "Library", "Main Square", "Campus"]
+
+
+def make_weekly_catalog(n_templates, seed=0):
+    """
+    Builds a weekly event catalog with the columns of events.xlsx
+    (event_name, weekday, start_time, end_time, location, category, description).
+    About 5% of the events run overnight (end_time before start_time).
+    """
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n_templates):
+        category = rnd.choice(CATEGORIES)
+        start_minutes = 15 * rnd.randrange(6 * 4, 22 * 4)
+        if rnd.random() < 0.05:
+            end_minutes = (start_minutes + 15 * rnd.randrange(8, 24)) % (24 * 60)
+        else:
+            end_minutes = min(start_minutes + 15 * rnd.randrange(2, 16), 24 * 60 - 15)
+        rows.append({
+            'event_name': f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS).title()} {i}",
+            'weekday': rnd.randrange(7),
+            'start_time': time(start_minutes // 60, start_minutes % 60),
+            'end_time': time(end_minutes // 60, end_minutes % 60),
+            'location': rnd.choice(LOCATIONS),
+            'category': category,
+            'description': " ".join(rnd.choice(WORDS) for _ in range(6)) + f" {category.lower()}",
+        })
+    return pd.DataFrame(rows)
+
+
+def write_catalog(df, file_path):
+    """
+    Writes a synthetic catalog to an Excel (.xlsx) or CSV file, like the real events file.
+    """
+    if file_path.endswith('.xlsx'):
+        df.to_excel(file_path, index=False)
+    else:
+        df.to_csv(file_path, index=False)
+    return file_path
+
+
+def make_user_names(n_users):
+    return [f"User {i}" for i in range(n_users)]
+
+
+def make_preferences(users, seed=0):
+    """
+    Gives every user 1-3 categories as comma-separated preferences (the storage format of the users table).
+    """
+    rnd = random.Random(seed)
+    return {user: ",".join(rnd.sample(CATEGORIES, rnd.randint(1, 3))) for user in users}
+
+
+def make_busy_map(users, window_start, days, slots_per_day, seed=0, compact=True):
+    """
+    Builds a user_busy_map like google_service.fetch_and_map_events returns it:
+    user -> BusySlots (or, with compact=False, the old list of {'summary', 'start', 'end'} dictionaries).
+    slots_per_day controls the density; half of the slots are timezone-aware (like timed Google events).
+    """
+    rnd = random.Random(seed)
+    tz = timezone(timedelta(hours=1))
+    start = datetime.combine(window_start, time(0, 0))
+    busy_map = {}
+    for user in users:
+        slots = []
+        for _ in range(int(days * slots_per_day)):
+            s = start + timedelta(minutes=15 * rnd.randrange(days * 24 * 4))
+            e = s + timedelta(minutes=15 * rnd.randrange(1, 13))
+            if rnd.random() < 0.5:
+                s, e = s.replace(tzinfo=tz), e.replace(tzinfo=tz)
+            slots.append({'summary': f"Busy {rnd.choice(WORDS)}", 'start': s, 'end': e})
+        busy_map[user] = BusySlots(slots) if compact else slots
+    return busy_map
+
+
+# --- Fake Google Calendar service ---
+
+class _Request:
+    def __init__(self, response):
+        self._response = response
+
+    def execute(self):
+        return self._response
+
+
+class _CalendarListResource:
+    def __init__(self, calendars):
+        self._calendars = calendars
+
+    def list(self, **kwargs):
+        return _Request({'items': [{'id': cal['id'], 'summary': cal['summary'], 'timeZone': cal.get('timeZone', 'UTC')}
+                                   for cal in self._calendars]})
+
+
+def _parse_utc(value):
+    """
+    Parses an RFC 3339 timestamp or a plain date (midnight UTC) into an aware UTC datetime.
+    """
+    if 'T' not in value:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+def _in_range(event, time_min, time_max):
+    """
+    True if the event overlaps the requested range (like the timeMin/timeMax filter of the API).
+    """
+    start = _parse_utc(event['start'].get('dateTime', event['start'].get('date')))
+    end = _parse_utc(event['end'].get('dateTime', event['end'].get('date')))
+    return (time_min is None or end > _parse_utc(time_min)) and (time_max is None or start < _parse_utc(time_max))
+
+
+class _EventsResource:
+    def __init__(self, calendars, page_size):
+        self._events = {cal['id']: cal['events'] for cal in calendars}
+        self._page_size = page_size
+
+    def list(self, calendarId, pageToken=None, maxResults=2500, timeMin=None, timeMax=None, **kwargs):
+        events = self._events[calendarId]
+        if timeMin or timeMax:
+            events = [e for e in events if _in_range(e, timeMin, timeMax)]
+        size = min(maxResults, self._page_size)
+        offset = int(pageToken or 0)
+        response = {'items': events[offset:offset + size]}
+        if offset + size < len(events):
+            response['nextPageToken'] = str(offset + size)
+        return _Request(response)
+
+
+class _FreebusyResource:
+    def __init__(self, calendars):
+        self._events = {cal['id']: cal['events'] for cal in calendars}
+
+    def query(self, body, **kwargs):
+        calendars = {}
+        for item in body['items']:
+            # Busy blocks of the timed events, merged like the real endpoint does (UTC, 'Z' suffix)
+            intervals = sorted(
+                (datetime.fromisoformat(e['start']['dateTime']).astimezone(timezone.utc),
+                 datetime.fromisoformat(e['end']['dateTime']).astimezone(timezone.utc))
+                for e in self._events.get(item['id'], [])
+                if 'dateTime' in e['start'] and _in_range(e, body.get('timeMin'), body.get('timeMax'))
+            )
+            merged = []
+            for start, end in intervals:
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            calendars[item['id']] = {'busy': [
+                {'start': s.strftime('%Y-%m-%dT%H:%M:%SZ'), 'end': e.strftime('%Y-%m-%dT%H:%M:%SZ')} for s, e in merged
+            ]}
+        return _Request({'kind': 'calendar#freeBusy', 'calendars': calendars})
+
+
+class FakeCalendarService:
+    """
+    Minimal stand-in for the Google Calendar API client (googleapiclient 'calendar' v3 service).
+    It answers calendarList().list(), paginated events().list() and freebusy().query() from in-memory data,
+    so fetch_and_map_events and fetch_busy_blocks can be timed without network access.
+    """
+
+    def __init__(self, calendars, page_size=250):
+        """
+        Args:
+            calendars (list): Dictionaries with 'id', 'summary' and 'events' (raw Google event resources).
+            page_size (int): Events per page (the real API returns at most 2500).
+        """
+        self._calendars = calendars
+        self._page_size = page_size
+
+    def calendarList(self):
+        return _CalendarListResource(self._calendars)
+
+    def events(self):
+        return _EventsResource(self._calendars, self._page_size)
+
+    def freebusy(self):
+        return _FreebusyResource(self._calendars)
+
+
+def make_fake_service(users, window_start, days, events_per_calendar, shared_calendars=1, seed=0):
+    """
+    Builds a FakeCalendarService with one calendar per user (named after the user) plus shared
+    calendars whose event titles mention users (exercising the title-matching fallback).
+    Events are raw Google resources: timed ones with 'dateTime' (with UTC offset), ~10% all-day ones with 'date'.
+    """
+    rnd = random.Random(seed)
+    start = datetime.combine(window_start, time(0, 0))
+
+    def raw_events(prefix, names):
+        events = []
+        for i in range(events_per_calendar):
+            s = start + timedelta(minutes=15 * rnd.randrange(days * 24 * 4))
+            title = f"{prefix} {rnd.choice(WORDS)} {rnd.choice(names) if names else ''}".strip()
+            if rnd.random() < 0.1:
+                events.append({'id': f"{prefix}-{i}", 'summary': title, 'status': 'confirmed',
+                               'start': {'date': s.date().isoformat()},
+                               'end': {'date': (s.date() + timedelta(days=1)).isoformat()}})
+            else:
+                e = s + timedelta(minutes=15 * rnd.randrange(1, 13))
+                events.append({'id': f"{prefix}-{i}", 'summary': title, 'status': 'confirmed',
+                               'start': {'dateTime': s.isoformat() + "+01:00"},
+                               'end': {'dateTime': e.isoformat() + "+01:00"}})
+        return events
+
+    # The events use a fixed +01:00 offset, i.e. the time zone 'Etc/GMT-1'
+    calendars = [{'id': f"cal-{i}", 'summary': user, 'timeZone': 'Etc/GMT-1', 'events': raw_events("Meeting", [])}
+                 for i, user in enumerate(users)]
+    calendars += [{'id': f"shared-{i}", 'summary': f"Team Calendar {i}", 'timeZone': 'Etc/GMT-1',
+                   'events': raw_events("Team", users)}
+                  for i in range(shared_calendars)]
+    return FakeCalendarService(calendars)
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class BusyDataCache:
+    """
+    In-memory cache for downloaded busy data (user_busy_map and fetch stats), shared by all pages and reruns.
+    Entries expire after ttl_seconds, can be refreshed explicitly, and the least recently used
+    entries are evicted beyond max_entries. Streamlit serves sessions from several threads,
+    so all access is guarded by a lock.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=16):
+        """
+        Args:
+            ttl_seconds (float): How long a download is served from memory.
+            max_entries (int): Maximum number of cached downloads (accounts x user lists x windows).
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (monotonic fetch time, synced_at datetime, busy map, stats)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_fetch(self, key, fetch, refresh=False):
+        """
+        Returns the cached (user_busy_map, stats, synced_at, True) for the key, or calls fetch() to download it
+        if there is no entry yet, the entry expired, or refresh=True (then the last value is False).
+        fetch must return a tuple (user_busy_map, stats).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry[2], entry[3], entry[1], True
+
+        # Download outside the lock, so other sessions aren't blocked by a slow fetch
+        busy_map, stats = fetch()
+        synced_at = datetime.now()
+        # Failed downloads (e.g., the calendar list couldn't be loaded) are not cached
+        if stats.get('error'):
+            return busy_map, stats, synced_at, False
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), synced_at, busy_map, stats)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return busy_map, stats, synced_at, False
+
+    def invalidate(self, predicate=None):
+        """
+        Drops all entries, or only those whose key matches predicate(key).
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
@@ -8,9 +8,12 @@ DB_PATH = "user_database.sqlite"
 def init_db():
     """
     Initializes the database and creates the necessary tables if they don't exist.
-    This function establishes the schema for two key entities:
+    This function establishes the schema for three key entities:
     Users: Stores individual user data and preferences
     Saved Events: Stores events recommended and finalized by the group 
+    Event Catalog: Stores the imported event templates and their concrete instances
+    Result Cache: Stores recommendation results so repeated searches are not rescored
+    Calendar Sync: Stores the synced Google Calendar events and sync tokens
     """
     # Connect SQLite database file. It will be created if it doesn't exist. 
     conn = sqlite3.connect(DB_PATH)
@@ -44,6 +47,103 @@ def init_db():
         )
     """)
     
+    # 3. Event Catalog Tables
+    # The catalog spreadsheet is imported into SQLite so searches only need one indexed range query.
+    # 'event_templates' holds the recurring weekly entries, 'events' the concrete (materialized) instances.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS event_templates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            weekday INTEGER,
+            start_offset INTEGER,
+            end_offset INTEGER,
+            category TEXT,
+            description TEXT,
+            location TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_event_templates_weekday ON event_templates (weekday)")
+
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            weekday INTEGER,
+            category TEXT,
+            description TEXT,
+            location TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_start_time ON events (start_time)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_weekday ON events (weekday)")
+
+    # Days for which the weekly templates have already been materialized into 'events'
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS materialized_days (
+            day TEXT PRIMARY KEY
+        )
+    """)
+
+    # Key/value metadata about the imported catalog (source file, fingerprint, format)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+    # 4. Recommendation Result Cache
+    # Pickled ranking results, keyed by a digest of everything that influences them
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            last_used TEXT
+        )
+    """)
+    # Which users an entry depends on (so a profile or calendar change only drops their entries)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache_users (
+            cache_key TEXT NOT NULL,
+            user_name TEXT NOT NULL,
+            PRIMARY KEY (cache_key, user_name)
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_users_user ON result_cache_users (user_name)")
+
+    # 5. Google Calendar Sync Tables
+    # Local copy of every synced calendar's events (raw start/end values as returned by Google)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS calendar_events (
+            calendar_id TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            summary TEXT,
+            start_raw TEXT,
+            end_raw TEXT,
+            PRIMARY KEY (calendar_id, event_id)
+        )
+    """)
+    # The sync token of every calendar (used to request only the changes since the last sync)
+    # and the date range its last full sync covered (time_min/time_max as 'YYYY-MM-DD')
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS calendar_sync (
+            calendar_id TEXT PRIMARY KEY,
+            summary TEXT,
+            sync_token TEXT,
+            synced_at TEXT,
+            time_min TEXT,
+            time_max TEXT
+        )
+    """)
+    # Databases created before the synced range was stored get the new columns
+    # (their calendars have no range yet, so the next sync downloads them completely)
+    sync_columns = {row[1] for row in c.execute("PRAGMA table_info(calendar_sync)")}
+    for column in ("time_min", "time_max"):
+        if column not in sync_columns:
+            c.execute(f"ALTER TABLE calendar_sync ADD COLUMN {column} TEXT")
+
     # Commit the changes to finalize table creation 
     conn.commit()
     conn.close()
@@ -196,3 +296,333 @@ def clear_saved_events():
     conn.close()
     # Call init_db() to recreate the empty table immediately
     init_db()
+
+
+# --- EVENT CATALOG FUNCTIONS ---
+
+def import_event_catalog(source, fingerprint, catalog_format, templates=None, events=None):
+    """
+    Replaces the stored event catalog with a freshly parsed one in a single transaction.
+    Rows are loaded in bulk with executemany.
+    Args:
+        source (str): Path of the catalog file the rows come from.
+        fingerprint (str): Version identifier of that file (used to detect changes).
+        catalog_format (str): 'weekly' (recurring templates) or 'fixed' (concrete events).
+        templates (list): Tuples of (title, weekday, start_offset, end_offset, category, description, location),
+            where the offsets are seconds after midnight.
+        events (list): Tuples of (title, start_time, end_time, weekday, category, description, location).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        # Drop the previous catalog version, including all materialized instances
+        c.execute("DELETE FROM event_templates")
+        c.execute("DELETE FROM events")
+        c.execute("DELETE FROM materialized_days")
+
+        if templates:
+            c.executemany("""
+                INSERT INTO event_templates (title, weekday, start_offset, end_offset, category, description, location)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, templates)
+        if events:
+            c.executemany("""
+                INSERT INTO events (title, start_time, end_time, weekday, category, description, location)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, events)
+
+        c.executemany("INSERT OR REPLACE INTO catalog_state (key, value) VALUES (?, ?)", [
+            ("source", source),
+            ("fingerprint", fingerprint),
+            ("format", catalog_format),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_catalog_state():
+    """
+    Returns the metadata of the imported catalog as a dictionary (empty if nothing was imported yet).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        c.execute("SELECT key, value FROM catalog_state")
+        return dict(c.fetchall())
+    except Exception:
+        # Gracefully handle error if the table hasn't been created yet
+        return {}
+    finally:
+        conn.close()
+
+def get_event_templates(weekdays):
+    """
+    Retrieves the recurring event templates scheduled on the given weekdays (uses the weekday index).
+    Returns: a list of tuples (title, weekday, start_offset, end_offset, category, description, location)
+    """
+    weekdays = list(weekdays)
+    if not weekdays:
+        return []
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    placeholders = ",".join("?" for _ in weekdays)
+    c.execute(f"""
+        SELECT title, weekday, start_offset, end_offset, category, description, location
+        FROM event_templates
+        WHERE weekday IN ({placeholders})
+        ORDER BY id
+    """, weekdays)
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def get_materialized_days(days):
+    """
+    Returns the subset of the given days (ISO date strings) whose event instances are already stored.
+    """
+    days = list(days)
+    if not days:
+        return set()
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    placeholders = ",".join("?" for _ in days)
+    c.execute(f"SELECT day FROM materialized_days WHERE day IN ({placeholders})", days)
+    found = {row[0] for row in c.fetchall()}
+    conn.close()
+    return found
+
+def add_event_instances(days, events):
+    """
+    Stores the materialized event instances for the given days (ISO date strings) in bulk.
+    Days that another session materialized in the meantime are skipped, so instances are never duplicated.
+    Args:
+        days (list): The days covered by the instances.
+        events (list): Tuples of (title, start_time, end_time, weekday, category, description, location).
+    """
+    days = list(days)
+    if not days:
+        return
+    conn = sqlite3.connect(DB_PATH)
+    # Take the write lock up front so the check-then-insert below is atomic
+    conn.isolation_level = None
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        placeholders = ",".join("?" for _ in days)
+        c.execute(f"SELECT day FROM materialized_days WHERE day IN ({placeholders})", list(days))
+        already_done = {row[0] for row in c.fetchall()}
+        new_days = {d for d in days if d not in already_done}
+
+        # The first 10 characters of the ISO start time are the day the instance belongs to
+        c.executemany("""
+            INSERT INTO events (title, start_time, end_time, weekday, category, description, location)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [e for e in events if e[1][:10] in new_days])
+        c.executemany("INSERT INTO materialized_days (day) VALUES (?)", [(d,) for d in new_days])
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def get_events_in_range(start, end):
+    """
+    Retrieves all catalog event instances starting in the half-open range [start, end)
+    with a single query on the start time index.
+    Args:
+        start (str): ISO datetime string of the range start.
+        end (str): ISO datetime string of the range end.
+    Returns: a list of tuples (title, start_time, end_time, category, description, location)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        SELECT title, start_time, end_time, category, description, location
+        FROM events
+        WHERE start_time >= ? AND start_time < ?
+        ORDER BY start_time, id
+    """, (start, end))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
+# --- RESULT CACHE FUNCTIONS ---
+
+def get_cached_result(cache_key):
+    """
+    Retrieves a cached recommendation result and marks it as recently used.
+    Returns: a tuple (payload bytes, list of user names) or None if the key is not cached.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        c.execute("SELECT payload FROM result_cache WHERE cache_key = ?", (cache_key,))
+        row = c.fetchone()
+        if row is None:
+            return None
+        c.execute("UPDATE result_cache SET last_used = datetime('now') WHERE cache_key = ?", (cache_key,))
+        c.execute("SELECT user_name FROM result_cache_users WHERE cache_key = ?", (cache_key,))
+        users = [r[0] for r in c.fetchall()]
+        conn.commit()
+        return row[0], users
+    except Exception as e:
+        # Gracefully handle error if the table hasn't been created yet
+        print(f"Result cache unavailable: {e}")
+        return None
+    finally:
+        conn.close()
+
+def save_cached_result(cache_key, users, payload, max_entries=200):
+    """
+    Stores a recommendation result and evicts the least recently used entries beyond max_entries.
+    Args:
+        cache_key (str): Digest identifying the search.
+        users (list): The users the result depends on.
+        payload (bytes): The pickled result.
+        max_entries (int): Maximum number of stored results.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        c.execute("INSERT OR REPLACE INTO result_cache (cache_key, payload, last_used) VALUES (?, ?, datetime('now'))",
+                  (cache_key, sqlite3.Binary(payload)))
+        c.execute("DELETE FROM result_cache_users WHERE cache_key = ?", (cache_key,))
+        c.executemany("INSERT INTO result_cache_users (cache_key, user_name) VALUES (?, ?)",
+                      [(cache_key, user) for user in set(users)])
+
+        # LRU eviction (ties on the timestamp are broken by insertion order)
+        c.execute("""
+            DELETE FROM result_cache WHERE cache_key IN (
+                SELECT cache_key FROM result_cache ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,))
+        c.execute("DELETE FROM result_cache_users WHERE cache_key NOT IN (SELECT cache_key FROM result_cache)")
+        conn.commit()
+    except Exception as e:
+        print(f"Could not cache result: {e}")
+    finally:
+        conn.close()
+
+def delete_cached_results_for_user(user_name):
+    """
+    Deletes every cached result that involves the given user (e.g., after a profile update).
+    Returns: the number of deleted results.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        c.execute("""
+            DELETE FROM result_cache WHERE cache_key IN (
+                SELECT cache_key FROM result_cache_users WHERE user_name = ?
+            )
+        """, (user_name,))
+        deleted = c.rowcount
+        c.execute("DELETE FROM result_cache_users WHERE cache_key NOT IN (SELECT cache_key FROM result_cache)")
+        conn.commit()
+        return deleted
+    except Exception as e:
+        print(f"Could not invalidate cached results: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def clear_result_cache():
+    """
+    Deletes all cached recommendation results.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("DELETE FROM result_cache")
+    c.execute("DELETE FROM result_cache_users")
+    conn.commit()
+    conn.close()
+
+
+# --- GOOGLE CALENDAR SYNC FUNCTIONS ---
+
+def get_calendar_sync_state(calendar_id):
+    """
+    Returns the sync state of a calendar as a tuple (sync_token, time_min, time_max),
+    or None if it was never synced. time_min/time_max are the dates ('YYYY-MM-DD') the last full sync covered.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT sync_token, time_min, time_max FROM calendar_sync WHERE calendar_id = ?", (calendar_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+def apply_calendar_changes(calendar_id, summary, upserts, deletions, sync_token, full_sync=False,
+                           time_min=None, time_max=None):
+    """
+    Applies a batch of synced changes to the local copy of a calendar in a single transaction.
+    Args:
+        calendar_id (str): The Google calendar id.
+        summary (str): The calendar name (kept for debugging).
+        upserts (list): Tuples of (event_id, summary, start_raw, end_raw) for new or updated events.
+        deletions (list): Ids of cancelled/deleted events.
+        sync_token (str): The new sync token (nextSyncToken of the last page).
+        full_sync (bool): Replace all stored events of the calendar (first sync, expired token or
+            a new synced range); this also drops events that lie before the new range.
+        time_min, time_max (str): The dates ('YYYY-MM-DD') covered by a full sync
+            (incremental syncs keep the stored range).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        if full_sync:
+            c.execute("DELETE FROM calendar_events WHERE calendar_id = ?", (calendar_id,))
+        c.executemany("DELETE FROM calendar_events WHERE calendar_id = ? AND event_id = ?",
+                      [(calendar_id, event_id) for event_id in deletions])
+        c.executemany("""
+            INSERT OR REPLACE INTO calendar_events (calendar_id, event_id, summary, start_raw, end_raw)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(calendar_id,) + tuple(row) for row in upserts])
+        if full_sync:
+            c.execute("""
+                INSERT OR REPLACE INTO calendar_sync (calendar_id, summary, sync_token, synced_at, time_min, time_max)
+                VALUES (?, ?, ?, datetime('now'), ?, ?)
+            """, (calendar_id, summary, sync_token, time_min, time_max))
+        else:
+            c.execute("""
+                UPDATE calendar_sync SET summary = ?, sync_token = ?, synced_at = datetime('now')
+                WHERE calendar_id = ?
+            """, (summary, sync_token, calendar_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_calendar_events(calendar_id):
+    """
+    Retrieves the locally stored events of a calendar.
+    Returns: a list of tuples (event_id, summary, start_raw, end_raw)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        SELECT event_id, summary, start_raw, end_raw
+        FROM calendar_events
+        WHERE calendar_id = ?
+        ORDER BY start_raw, event_id
+    """, (calendar_id,))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def reset_calendar_sync(calendar_id=None):
+    """
+    Forgets the sync state (and stored events) of one calendar or of all calendars,
+    so the next sync downloads everything again.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    if calendar_id is None:
+        c.execute("DELETE FROM calendar_events")
+        c.execute("DELETE FROM calendar_sync")
+    else:
+        c.execute("DELETE FROM calendar_events WHERE calendar_id = ?", (calendar_id,))
+        c.execute("DELETE FROM calendar_sync WHERE calendar_id = ?", (calendar_id,))
+    conn.commit()
+    conn.close()
@@ -1,30 +1,220 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
-def fetch_and_map_events(service, all_user_names):
+import database
+from availability import BusySlots
+from busy_cache import BusyDataCache
+
+# Time range covered by the calendar data: 30 days back (for context/past busy times) and 6 months ahead
+PAST_DAYS = 30
+FUTURE_DAYS = 180
+
+# The synced range of a calendar is renewed (full resync, old events dropped) once it reaches
+# this many days less far ahead than a fresh sync would
+SYNC_RANGE_MAX_AGE_DAYS = 7
+
+# Number of calendars fetched at the same time (1 = one after another)
+CALENDAR_FETCH_WORKERS = 8
+
+# Maximum number of calendars per freebusy().query request (limit of the Calendar API)
+FREEBUSY_BATCH_SIZE = 50
+
+# Partial responses: only request the event fields the app actually uses
+EVENT_FIELDS = "items(id,summary,start,end,status),nextPageToken"
+SYNC_FIELDS = EVENT_FIELDS + ",nextSyncToken"
+FREEBUSY_FIELDS = "calendars(busy,errors)"
+
+# Downloaded busy data is served from memory for this many seconds (across pages and reruns)
+BUSY_CACHE_TTL_SECONDS = float(os.environ.get("MEETLY_BUSY_CACHE_TTL", "300"))
+BUSY_CACHE_SIZE = 16
+BUSY_CACHE = BusyDataCache(BUSY_CACHE_TTL_SECONDS, BUSY_CACHE_SIZE)
+
+
+def resolve_window(time_min=None, time_max=None):
+    """
+    Resolves the time range of a fetch into two datetimes.
+    Defaults to 30 days back and 6 months ahead; dates are taken as midnight.
+    """
+    if time_min is None:
+        time_min = datetime.utcnow() - timedelta(days=PAST_DAYS)
+    elif not isinstance(time_min, datetime):
+        time_min = datetime.combine(time_min, datetime.min.time())
+    if time_max is None:
+        time_max = datetime.utcnow() + timedelta(days=FUTURE_DAYS)
+    elif not isinstance(time_max, datetime):
+        time_max = datetime.combine(time_max, datetime.min.time())
+    return time_min, time_max
+
+
+def _rfc3339(dt):
+    """
+    Formats a datetime for the API (naive datetimes are sent as UTC with the 'Z' indicator).
+    """
+    return dt.isoformat() if dt.tzinfo is not None else dt.isoformat() + 'Z'
+
+
+def match_calendar_owner(cal_summary, all_user_names):
+    """
+    Determines which user a calendar belongs to by matching its name/summary against the user names.
+    Returns the user name, or None if no user matches.
+    """
+    cal_summary_clean = cal_summary.lower().strip()
+    # Try to match the calendar name/summary against the list of target user names 
+    for name in all_user_names:
+        user_name_clean = name.lower().strip()
+        # Key word matching: Is the user name in the calendar summary, or vice versa?
+        if user_name_clean in cal_summary_clean or cal_summary_clean in user_name_clean:
+            return name # Stop checking once an owner is found 
+    return None
+
+
+def parse_event_times(start_raw, end_raw):
+    """
+    Parses the start/end of a Google event ('dateTime' or all-day 'date' strings) into datetimes.
+    Raises ValueError if the values can't be parsed.
+    """
+    # Date Parsing: Determine if it's a timed event ('T' separator in ISP format) or all-day
+    if "T" in start_raw: 
+        # Timed event (e.g., 2025-12-03T10:00:00+01:00)
+        return datetime.fromisoformat(start_raw), datetime.fromisoformat(end_raw)
+    # All day event (e.g., 2025-12-03)
+    # All-day events often use the day after the event ends as the 'end' date
+    # For simplicity in availabiltiy checking, we'll keep the full datetime objects. 
+    return datetime.strptime(start_raw, "%Y-%m-%d"), datetime.strptime(end_raw, "%Y-%m-%d")
+
+
+def assign_event(user_busy_map, all_user_names, owner_name, summary, s_dt, e_dt):
+    """
+    Adds a busy slot to the calendar owner or, for calendars without an owner, to every user named in the title.
+    Returns True if the event was assigned to at least one user.
+    """
+    # Scenario 1 (High Confidence): Assign to the Calendar Owner 
+    if owner_name:
+        user_busy_map[owner_name].add(summary, s_dt, e_dt)
+        return True
+
+    # Scenario 2 (Fallback): If no owner was determined, check event title for a *User Keyword Match*
+    assigned = False
+    for name in all_user_names:
+        # If a user's name is found in the event title 
+        if name.strip().lower() in summary.lower():
+            user_busy_map[name].add(summary, s_dt, e_dt)
+            assigned = True
+            # If multiple names are in the title, it will be assigned to all of them 
+    return assigned
+
+
+def _thread_http_factory(service):
+    """
+    Returns a function that creates a new authorized HTTP object for the credentials of the service
+    (httplib2 connections are not thread-safe, so every fetch thread needs its own one).
+    Returns None if the service has no credentials to copy (e.g., a test double).
+    """
+    credentials = getattr(getattr(service, '_http', None), 'credentials', None)
+    if credentials is None:
+        return None
+    import httplib2
+    import google_auth_httplib2
+    return lambda: google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+
+
+def _execute(request, http=None):
+    """
+    Executes an API request, on the given HTTP object if there is one.
+    """
+    return request.execute(http=http) if http is not None else request.execute()
+
+
+def _run_per_calendar(service, calendars, fetch, max_workers):
+    """
+    Runs fetch(calendar, http) for every calendar and returns the outcomes in calendar order
+    as (result, error) tuples, so the caller can process them exactly like a serial loop.
+    With max_workers > 1, a bounded thread pool keeps the requests of all calendars in flight together;
+    every thread uses its own authorized HTTP object.
+    """
+    def run(cal, http=None):
+        try:
+            return fetch(cal, http), None
+        except Exception as e:
+            return None, e
+
+    if max_workers <= 1 or len(calendars) <= 1:
+        return [run(cal) for cal in calendars]
+
+    make_http = _thread_http_factory(service)
+    local = threading.local()
+
+    def run_in_thread(cal):
+        http = None
+        if make_http is not None:
+            http = getattr(local, 'http', None)
+            if http is None:
+                http = local.http = make_http()
+        return run(cal, http)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calendars))) as pool:
+        return list(pool.map(run_in_thread, calendars))
+
+
+def _fetch_calendar_events(service, cal_id, time_min, time_max, http=None):
+    """
+    Fetches all events of one calendar in the time range (using Pagination to get ALL events).
+    """
+    all_raw_events_for_this_cal = []
+    page_token = None
+    while True:
+        # API call: Retrieve events from the current calendar within the time range
+        events_result = _execute(service.events().list(
+            calendarId=cal_id, 
+            timeMin=time_min, 
+            timeMax=time_max,
+            maxResults=2500,     # Max number of results per page 
+            singleEvents=True,    # Expand recurring events into individual instances 
+            orderBy='startTime',    # Recommended for paginated lists
+            pageToken=page_token,     # Token used to fetch the next page of result 
+            fields=EVENT_FIELDS      # Only the fields we use (smaller pages)
+        ), http)
+        
+        items = events_result.get('items', [])
+        all_raw_events_for_this_cal.extend(items)
+
+        # Check for the next page token to handle caledars with many events 
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return all_raw_events_for_this_cal # Stop if no more pages
+
+
+def fetch_and_map_events(service, all_user_names, max_workers=None, time_min=None, time_max=None):
     """
     Fetches events from ALL calendars associated with the user's Google account.
+    Only the events overlapping the time range (time_min to time_max, datetimes or dates) are requested;
+    by default 30 days back and 6 months ahead.
     
     Logic:
     1. It retrieves a list of all calendars.
-    2. It iterates through each calendar and fetches events (using Pagination to get ALL events).
-    3. It attempts to map each event to a specific user.
+    2. It fetches the events of all calendars concurrently (up to max_workers at a time,
+       default CALENDAR_FETCH_WORKERS; using Pagination to get ALL events).
+    3. It attempts to map each event to a specific user (in calendar order, like a serial fetch).
     
     Returns:
-        user_busy_map: A dictionary mapping user names to their list of busy slots.
+        user_busy_map: A dictionary mapping user names to their busy slots (compact BusySlots containers).
         stats: A dictionary containing debugging information.
     """
     
     # 1. Define Time Range for API fetch
-    # The range is set to look back 30 days (for context/past busy times) and 6 months ahead (for future planning)
-    start_dt = datetime.utcnow() - timedelta(days=30)
-    end_dt = datetime.utcnow() + timedelta(days=180) # Look 6 months ahead
+    # By default the range looks back 30 days (for context/past busy times) and 6 months ahead (for future planning)
+    start_dt, end_dt = resolve_window(time_min, time_max)
 
     # Convert datetimes to the required ISO 8601 format with 'Z' (Zulu/UTC) time zone indicator
-    time_min = start_dt.isoformat() + 'Z' 
-    time_max = end_dt.isoformat() + 'Z'
+    time_min = _rfc3339(start_dt)
+    time_max = _rfc3339(end_dt)
     
     # Initialize data structures for results and debugging
-    user_busy_map = {name: [] for name in all_user_names} # Final output: busy slots organized by user name 
+    user_busy_map = {name: BusySlots() for name in all_user_names} # Final output: busy slots organized by user name 
     debug_unassigned = []  # List of event titles that couldn't be mapped to any user 
     debug_calendars_found = []  # List of all calendar summaries processed
     debug_errors = []           # List of API errors encountered 
@@ -38,49 +228,23 @@ def fetch_and_map_events(service, all_user_names):
         # Handle failure to load the initial list of calendars
         return user_busy_map, {"error": f"Could not load calendar list: {e}", "total_events": 0}
 
+    # --- FETCHING EVENTS (all calendars concurrently) ---
+    fetched = _run_per_calendar(
+        service, calendars,
+        lambda cal, http: _fetch_calendar_events(service, cal['id'], time_min, time_max, http),
+        CALENDAR_FETCH_WORKERS if max_workers is None else max_workers
+    )
+
     # Iterate through each calendar found
-    for cal in calendars:
-        cal_id = cal['id']
+    for cal, (all_raw_events_for_this_cal, error) in zip(calendars, fetched):
         cal_summary = cal.get('summary', 'Unknown')
         debug_calendars_found.append(cal_summary)
         
         # --- STEP A: Determine Calendar Ownership ---
-        owner_name = None
-        cal_summary_clean = cal_summary.lower().strip()
-        # Try to match the calendar name/summary against the list of target user names 
-        for name in all_user_names:
-            user_name_clean = name.lower().strip()
-            # Key word matching: Is the user name in the calendar summary, or vice versa?
-            if user_name_clean in cal_summary_clean or cal_summary_clean in user_name_clean:
-                owner_name = name
-                break # Stop checking once an owner is found 
-        
-        # --- FETCHING EVENTS (With Pagination Loop) ---
-        all_raw_events_for_this_cal = []
-        page_token = None
+        owner_name = match_calendar_owner(cal_summary, all_user_names)
         
-        try:
-            while True:
-                # API call: Retrieve events from the current calendar within the time range
-                events_result = service.events().list(
-                    calendarId=cal_id, 
-                    timeMin=time_min, 
-                    timeMax=time_max,
-                    maxResults=2500,     # Max number of results per page 
-                    singleEvents=True,    # Expand recurring events into individual instances 
-                    orderBy='startTime',    # Recommended for paginated lists
-                    pageToken=page_token     # Token used to fetch the next page of result 
-                ).execute()
-                
-                items = events_result.get('items', [])
-                all_raw_events_for_this_cal.extend(items)
-
-                # Check for the next page token to handle caledars with many events 
-                page_token = events_result.get('nextPageToken')
-                if not page_token:
-                    break # Stop if no more pages
-        except Exception as e:
-            debug_errors.append(f"Error reading '{cal_summary}': {str(e)}")
+        if error is not None:
+            debug_errors.append(f"Error reading '{cal_summary}': {str(error)}")
             continue # Skip to the next calendar if this one fails 
 
         total_events_count += len(all_raw_events_for_this_cal)
@@ -95,43 +259,10 @@ def fetch_and_map_events(service, all_user_names):
             
             if start_raw and end_raw:
                 try:
-                    # Date Parsing: Determine if it's a timed event ('T' separator in ISP format) or all-day
-                    if "T" in start_raw: 
-                        # Timed event (e.g., 2025-12-03T10:00:00+01:00)
-                        s_dt = datetime.fromisoformat(start_raw)
-                        e_dt = datetime.fromisoformat(end_raw)
-                    else: 
-                        # All day event (e.g., 2025-12-03)
-                        s_dt = datetime.strptime(start_raw, "%Y-%m-%d")
-                        e_dt = datetime.strptime(end_raw, "%Y-%m-%d")
-                        # All-day events often use the day after the event ends as the 'end' date
-                        # For simplicity in availabiltiy checking, we'll keep the full datetime objects. 
-
-                    assigned = False
-                    
+                    s_dt, e_dt = parse_event_times(start_raw, end_raw)
+
                     # --- STEP B: Assign Event to User ---
-                    
-                    # Scenario 1 (High Confidence): Assign to the Calendar Owner 
-                    if owner_name:
-                        user_busy_map[owner_name].append({
-                            'summary': summary, 
-                            'start': s_dt, 
-                            'end': e_dt
-                        })
-                        assigned = True
-                    
-                    # Scenario 2 (Fallback): If no owner was determined, check event title for a *User Keyword Match*
-                    else:
-                        for name in all_user_names:
-                            # If a user's name is found in the event title 
-                            if name.strip().lower() in summary.lower():
-                                user_busy_map[name].append({
-                                    'summary': summary, 
-                                    'start': s_dt, 
-                                    'end': e_dt
-                                })
-                                assigned = True
-                                # If multiple names are in the title, it will be assigned to all of them 
+                    assigned = assign_event(user_busy_map, all_user_names, owner_name, summary, s_dt, e_dt)
                    
                     # Log events that could not be assigned to any user 
                     if not assigned:
@@ -153,3 +284,358 @@ def fetch_and_map_events(service, all_user_names):
     }
     
     return user_busy_map, stats
+
+
+# --- Incremental sync (sync tokens stored in SQLite) ---
+
+def _is_sync_token_expired(error):
+    """
+    Google answers '410 Gone' when a sync token is no longer valid; a full resync is needed then.
+    """
+    return getattr(getattr(error, 'resp', None), 'status', None) == 410
+
+
+def _list_calendar_changes(service, cal_id, sync_token, time_min, time_max, http=None):
+    """
+    Pages through events().list of one calendar.
+    With a sync token only the changes since the last sync are returned (including cancelled events),
+    without one all events in the time range are returned.
+    Returns a tuple (list of raw events, nextSyncToken).
+    """
+    items = []
+    page_token = None
+    # The time range can't be combined with a sync token (the token remembers the original query)
+    query = {'syncToken': sync_token} if sync_token else {'timeMin': time_min, 'timeMax': time_max}
+    while True:
+        events_result = _execute(service.events().list(
+            calendarId=cal_id,
+            maxResults=2500,
+            singleEvents=True,
+            pageToken=page_token,
+            fields=SYNC_FIELDS,
+            **query
+        ), http)
+        items.extend(events_result.get('items', []))
+
+        # The sync token for the next call is only included in the last page
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return items, events_result.get('nextSyncToken')
+
+
+def _sync_range(window_start, window_end):
+    """
+    Returns the dates (first day, day after the last day) a full sync downloads:
+    PAST_DAYS back and FUTURE_DAYS ahead of today, widened to include the requested window.
+    """
+    today = datetime.utcnow().date()
+    first_day = min(today - timedelta(days=PAST_DAYS), window_start.date())
+    end_day = max(today + timedelta(days=FUTURE_DAYS), window_end.date() + timedelta(days=1))
+    return first_day, end_day
+
+
+def _needs_full_sync(state, window_start, window_end):
+    """
+    Decides whether a calendar has to be downloaded completely instead of only its changes:
+    it was never synced, the requested window lies (partly) outside the synced range,
+    or the synced range has aged (it no longer reaches far enough ahead).
+    Args:
+        state (tuple): (sync_token, time_min, time_max) from database.get_calendar_sync_state, or None.
+    """
+    if state is None or not all(state):
+        return True
+    _, synced_min, synced_max = state
+    if window_start.date().isoformat() < synced_min or window_end.date().isoformat() >= synced_max:
+        return True
+    oldest_end = datetime.utcnow().date() + timedelta(days=FUTURE_DAYS - SYNC_RANGE_MAX_AGE_DAYS)
+    return synced_max < oldest_end.isoformat()
+
+
+def _download_calendar_changes(service, cal_id, window_start, window_end, http=None):
+    """
+    Downloads the changes of one calendar since its stored sync token, or all its events in the sync range
+    if a full sync is needed (see _needs_full_sync). An expired token (410) also triggers a full download.
+    Returns a tuple (raw events, nextSyncToken, True if it was a full sync, synced (first day, end day)).
+    """
+    state = database.get_calendar_sync_state(cal_id)
+    full_sync = _needs_full_sync(state, window_start, window_end)
+    first_day, end_day = _sync_range(window_start, window_end)
+    time_min = _rfc3339(datetime.combine(first_day, datetime.min.time()))
+    time_max = _rfc3339(datetime.combine(end_day, datetime.min.time()))
+    try:
+        changes, next_token = _list_calendar_changes(service, cal_id, None if full_sync else state[0],
+                                                     time_min, time_max, http)
+    except Exception as e:
+        if full_sync or not _is_sync_token_expired(e):
+            raise
+        # The token expired: download everything again (the local copy is replaced)
+        full_sync = True
+        changes, next_token = _list_calendar_changes(service, cal_id, None, time_min, time_max, http)
+    return changes, next_token, full_sync, (first_day.isoformat(), end_day.isoformat())
+
+
+def _store_calendar_changes(cal_id, cal_summary, changes, next_token, full_sync, sync_range):
+    """
+    Applies downloaded changes (inserts, updates and cancellations) to the local copy of a calendar.
+    A full sync replaces the stored events and records the new synced range.
+    """
+    upserts = []
+    deletions = []
+    for event in changes:
+        if event.get('status') == 'cancelled':
+            deletions.append(event['id'])
+            continue
+        start = event.get('start', {})
+        end = event.get('end', {})
+        upserts.append((
+            event['id'],
+            event.get('summary', 'Event').strip(),
+            start.get('dateTime', start.get('date')),
+            end.get('dateTime', end.get('date')),
+        ))
+
+    database.apply_calendar_changes(cal_id, cal_summary, upserts, deletions, next_token, full_sync, *sync_range)
+
+
+def sync_and_map_events(service, all_user_names, max_workers=None, time_min=None, time_max=None, full_sync=False):
+    """
+    Incremental version of fetch_and_map_events.
+    Every calendar's events and its sync token are stored in SQLite, so after the first load each page load
+    only costs one small 'changes since the last sync' request per calendar.
+    The local copy covers 30 days back and 6 months ahead (widened to include time_min to time_max);
+    it is downloaded again when the requested window lies outside it or it has aged (see _needs_full_sync),
+    or for every calendar if full_sync=True. Only the events overlapping time_min to time_max
+    (default: the 30 days back / 6 months ahead range) are mapped into the user_busy_map.
+    The requests of all calendars run concurrently (up to max_workers, default CALENDAR_FETCH_WORKERS);
+    the changes are stored one calendar after another.
+    The user_busy_map is then built from the local copy with the same ownership matching.
+
+    Returns:
+        user_busy_map: A dictionary mapping user names to their busy slots (compact BusySlots containers).
+        stats: The same debugging information as fetch_and_map_events, plus the number of
+            received changes ('changed_events') and full syncs ('full_syncs').
+    """
+    # 1. Define the range to map (full syncs download at least this range, see _sync_range)
+    window_start, window_end = resolve_window(time_min, time_max)
+    first_day = window_start.date().isoformat()
+    last_day = window_end.date().isoformat()
+
+    user_busy_map = {name: BusySlots() for name in all_user_names}
+    debug_unassigned = []
+    debug_calendars_found = []
+    debug_errors = []
+    total_events_count = 0
+    changed_events = 0
+    full_syncs = 0
+
+    try:
+        calendars = service.calendarList().list().execute().get('items', [])
+    except Exception as e:
+        return user_busy_map, {"error": f"Could not load calendar list: {e}", "total_events": 0}
+
+    # A forced resync forgets the stored events and sync tokens first
+    if full_sync:
+        for cal in calendars:
+            database.reset_calendar_sync(cal['id'])
+
+    # 2. Download the changes of all calendars concurrently
+    downloads = _run_per_calendar(
+        service, calendars,
+        lambda cal, http: _download_calendar_changes(service, cal['id'], window_start, window_end, http),
+        CALENDAR_FETCH_WORKERS if max_workers is None else max_workers
+    )
+
+    for cal, (download, error) in zip(calendars, downloads):
+        cal_id = cal['id']
+        cal_summary = cal.get('summary', 'Unknown')
+        debug_calendars_found.append(cal_summary)
+        owner_name = match_calendar_owner(cal_summary, all_user_names)
+
+        # Sync the local copy (on errors, the last synced state of the calendar is used)
+        try:
+            if error is not None:
+                raise error
+            changes, next_token, was_full_sync, sync_range = download
+            _store_calendar_changes(cal_id, cal_summary, changes, next_token, was_full_sync, sync_range)
+            changed_events += len(changes)
+            full_syncs += int(was_full_sync)
+        except Exception as e:
+            debug_errors.append(f"Error syncing '{cal_summary}': {str(e)}")
+
+        # 3. Assign the stored events inside the time range to the users
+        for _, summary, start_raw, end_raw in database.get_calendar_events(cal_id):
+            if not (start_raw and end_raw):
+                continue
+            # Compare the date part of the ISO strings (changes can also arrive for events outside the range)
+            if start_raw[:10] > last_day or end_raw[:10] < first_day:
+                continue
+            total_events_count += 1
+            try:
+                s_dt, e_dt = parse_event_times(start_raw, end_raw)
+            except ValueError:
+                continue
+            if not assign_event(user_busy_map, all_user_names, owner_name, summary, s_dt, e_dt):
+                if len(debug_unassigned) < 50:
+                    debug_unassigned.append(f"Event: '{summary}' | Calendar: '{cal_summary}'")
+
+    stats = {
+        "total_events": total_events_count,
+        "assigned": total_events_count - len(debug_unassigned),
+        "unassigned_titles": debug_unassigned,
+        "calendars_found": debug_calendars_found,
+        "errors": debug_errors,
+        "changed_events": changed_events,
+        "full_syncs": full_syncs,
+    }
+    return user_busy_map, stats
+
+
+# --- Free/busy backend (busy intervals only, no event details) ---
+
+def _parse_freebusy_time(value, tz=None):
+    """
+    Parses an RFC 3339 timestamp of the free/busy response (e.g., 2025-12-03T09:00:00Z).
+    The response is in UTC; it is converted to the calendar's time zone, so the wall-clock time
+    matches what events().list returns for the same event.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed.astimezone(tz) if tz is not None else parsed
+
+
+def _calendar_time_zone(cal):
+    """
+    Returns the time zone of a calendarList entry (None if it's missing or unknown).
+    """
+    try:
+        return ZoneInfo(cal['timeZone']) if cal.get('timeZone') else None
+    except Exception:
+        return None
+
+
+def fetch_busy_blocks(service, all_user_names, max_workers=None, time_min=None, time_max=None):
+    """
+    Alternative to fetch_and_map_events for the recommender, which only needs busy intervals:
+    the freebusy().query endpoint returns just the busy blocks of each calendar (no titles,
+    no event resources), which is an order of magnitude less data.
+
+    Calendars are assigned with the same ownership matching as fetch_and_map_events. Only calendars
+    with an owner are queried, because without titles their blocks can't be assigned to a user.
+    The owned calendars are sent in batches of FREEBUSY_BATCH_SIZE (concurrently, up to max_workers).
+    Only the time range time_min to time_max is queried (default: 30 days back and 6 months ahead).
+
+    Returns:
+        user_busy_map: A dictionary mapping user names to their busy slots (compact BusySlots containers, summary 'Busy').
+        stats: The same debugging information as fetch_and_map_events (calendars without an owner
+            are listed under 'unassigned_titles').
+    """
+    # 1. Define the time range (same default range as fetch_and_map_events)
+    start_dt, end_dt = resolve_window(time_min, time_max)
+    time_min = _rfc3339(start_dt)
+    time_max = _rfc3339(end_dt)
+
+    user_busy_map = {name: BusySlots() for name in all_user_names}
+    debug_unassigned = []
+    debug_calendars_found = []
+    debug_errors = []
+    total_events_count = 0
+
+    try:
+        calendars = service.calendarList().list().execute().get('items', [])
+    except Exception as e:
+        return user_busy_map, {"error": f"Could not load calendar list: {e}", "total_events": 0}
+
+    # 2. Determine the owner of every calendar
+    owners = {}
+    for cal in calendars:
+        cal_summary = cal.get('summary', 'Unknown')
+        debug_calendars_found.append(cal_summary)
+        owner_name = match_calendar_owner(cal_summary, all_user_names)
+        if owner_name:
+            owners[cal['id']] = (owner_name, cal_summary, _calendar_time_zone(cal))
+        elif len(debug_unassigned) < 50:
+            debug_unassigned.append(f"Calendar: '{cal_summary}' (no owner, skipped in free/busy mode)")
+
+    # 3. Query the busy blocks in batches of calendars
+    owned_ids = list(owners)
+    batches = [owned_ids[i:i + FREEBUSY_BATCH_SIZE] for i in range(0, len(owned_ids), FREEBUSY_BATCH_SIZE)]
+    responses = _run_per_calendar(
+        service, batches,
+        lambda batch, http: _execute(service.freebusy().query(body={
+            'timeMin': time_min,
+            'timeMax': time_max,
+            'items': [{'id': cal_id} for cal_id in batch],
+        }, fields=FREEBUSY_FIELDS), http),
+        CALENDAR_FETCH_WORKERS if max_workers is None else max_workers
+    )
+
+    # 4. Assign the busy blocks to the calendar owners (in calendar order)
+    for batch, (response, error) in zip(batches, responses):
+        if error is not None:
+            debug_errors.append(f"Error querying free/busy for {len(batch)} calendars: {str(error)}")
+            continue
+        results = response.get('calendars', {})
+        for cal_id in batch:
+            owner_name, cal_summary, tz = owners[cal_id]
+            result = results.get(cal_id, {})
+            if result.get('errors'):
+                debug_errors.append(f"Error reading '{cal_summary}': {result['errors']}")
+                continue
+            for block in result.get('busy', []):
+                total_events_count += 1
+                try:
+                    s_dt = _parse_freebusy_time(block['start'], tz)
+                    e_dt = _parse_freebusy_time(block['end'], tz)
+                except (KeyError, ValueError):
+                    continue
+                assign_event(user_busy_map, all_user_names, owner_name, 'Busy', s_dt, e_dt)
+
+    stats = {
+        "total_events": total_events_count,
+        "assigned": total_events_count,
+        "unassigned_titles": debug_unassigned,
+        "calendars_found": debug_calendars_found,
+        "errors": debug_errors
+    }
+    return user_busy_map, stats
+
+
+# --- Cached access (used by the pages) ---
+
+def account_key(service):
+    """
+    Returns a stable, anonymous identifier of the Google account behind a service
+    (a digest of its refresh token), so cached busy data is never shared between accounts.
+    """
+    credentials = getattr(getattr(service, '_http', None), 'credentials', None)
+    secret = getattr(credentials, 'refresh_token', None) or getattr(credentials, 'token', None)
+    if not secret:
+        # No credentials to identify the account: only share the cache with the same service object
+        return f"service-{id(service)}"
+    return hashlib.sha1(secret.encode('utf-8')).hexdigest()
+
+
+def load_busy_map(service, all_user_names, time_min=None, time_max=None, backend="events", refresh=False):
+    """
+    Returns the user_busy_map for the time range, served from BUSY_CACHE while the last download is
+    younger than BUSY_CACHE_TTL_SECONDS (refresh=True forces a new download, for the 'events' backend
+    a full resync of every calendar).
+    The cache key is the account, the user list, the time range and the backend.
+    Args:
+        backend (str): 'events' (incremental event sync, with titles) or 'freebusy' (busy blocks only).
+    Returns:
+        user_busy_map, stats: Like fetch_and_map_events; stats also hold 'synced_at' (time of the
+            download) and 'from_cache'.
+    """
+    start_dt, end_dt = resolve_window(time_min, time_max)
+    if time_min is None and time_max is None:
+        # The default range moves with the clock, so key it by day
+        start_dt, end_dt = start_dt.date(), end_dt.date()
+    key = (account_key(service), tuple(all_user_names), start_dt, end_dt, backend)
+
+    def fetch():
+        if backend == "freebusy":
+            return fetch_busy_blocks(service, all_user_names, time_min=time_min, time_max=time_max)
+        return sync_and_map_events(service, all_user_names, time_min=time_min, time_max=time_max, full_sync=refresh)
+
+    user_busy_map, stats, synced_at, from_cache = BUSY_CACHE.get_or_fetch(key, fetch, refresh=refresh)
+    return user_busy_map, dict(stats, synced_at=synced_at, from_cache=from_cache)
@@ -0,0 +1,87 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Local JSON-lines file the stats of every search are appended to (one JSON object per line)
+STATS_LOG_PATH = "pipeline_stats.jsonl"
+
+
+class PipelineStats:
+    """
+    Lightweight timers and counters for one run of the recommendation pipeline.
+    Stages are timed with the stage() context manager (or the timed() decorator); a stage that
+    runs several times accumulates its time. Counters record sizes like the number of events.
+    """
+
+    def __init__(self, name="search"):
+        """
+        Args:
+            name (str): Label of the run (e.g., 'search' or 'rerank').
+        """
+        self.name = name
+        self.timings = {}   # stage -> seconds (in the order the stages first ran)
+        self.counters = {}  # counter -> value
+        self.created_at = datetime.now()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the enclosed block and adds the duration to the given stage.
+        """
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def timed(self, name):
+        """
+        Decorator version of stage(): every call of the decorated function is timed as the given stage.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, amount=1):
+        """
+        Increases a counter (counters start at 0).
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        """
+        Sets a counter to a value (e.g., the size of the catalog).
+        """
+        self.counters[name] = value
+
+    @property
+    def total_seconds(self):
+        return sum(self.timings.values())
+
+    def to_dict(self):
+        """
+        Returns the stats as a JSON-serializable dictionary.
+        """
+        return {
+            'name': self.name,
+            'recorded_at': self.created_at.isoformat(timespec='seconds'),
+            'total_seconds': round(self.total_seconds, 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.timings.items()},
+            'counters': dict(self.counters),
+        }
+
+    def log(self, path=None):
+        """
+        Appends the stats as one JSON line to the log file (STATS_LOG_PATH by default), for trend analysis.
+        """
+        try:
+            with open(path or STATS_LOG_PATH, 'a', encoding='utf-8') as log_file:
+                log_file.write(json.dumps(self.to_dict(), default=str) + "\n")
+        except OSError as e:
+            print(f"Could not write pipeline stats: {e}")
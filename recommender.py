@@ -1,108 +1,373 @@
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime, timedelta, time
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 
+import database
+from availability import BusyBitmap, BusyIndex, BusySlots, free_mask, from_epoch, series_to_epoch, sweep_free_windows, to_epoch
+from instrumentation import PipelineStats
+from result_cache import ResultCache, make_cache_key
+from scoring import PreferenceMatcher, RankedResults, get_semantic_model
 
-def load_local_events(file_path="events.xlsx"):
+# In-process cache of parsed event catalogs: {absolute path: (fingerprint, catalog dict)}
+_CATALOG_CACHE = {}
+
+# Suffix of the binary sidecar file that persists a parsed catalog next to the source file
+CATALOG_CACHE_SUFFIX = ".cache.pkl"
+
+
+def _parse_time(value, default=None):
+    """
+    Parses a single 'start_time'/'end_time' cell into a time object.
+    Handles both 'time' objects (from Excel reading) and string representations.
+    Returns the default if parsing fails and a default is given, otherwise re-raises.
+    """
+    if isinstance(value, time):
+        return value
+    try:
+        return pd.to_datetime(str(value)).time()
+    except Exception:
+        if default is None:
+            raise
+        return default
+
+
+def _time_to_offset(value, default=None):
+    """
+    Converts a time cell into its offset from midnight (as a Timedelta).
+    Returns NaT if the value cannot be parsed and no default is given.
+    """
+    try:
+        t = _parse_time(value, default)
+        return pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second, microseconds=t.microsecond)
+    except Exception:
+        return pd.NaT
+
+
+def _normalize_weekly_templates(df):
+    """
+    Turns the raw rows of a weekly catalog into normalized event templates.
+    Every start/end time is parsed exactly once here (as an offset from midnight),
+    so expanding the templates later only needs array arithmetic.
+    """
+    # Parse times once per distinct value (catalogs repeat the same few times a lot)
+    def parse_column(column, default=None):
+        offsets = {v: _time_to_offset(v, default) for v in column.astype(object).unique()}
+        return column.astype(object).map(offsets)
+
+    templates = pd.DataFrame({
+        'weekday': pd.to_numeric(df['weekday'], errors='coerce'),
+        'start_offset': pd.to_timedelta(parse_column(df['start_time'])),
+        # Default endtime is midnight if parsing fails
+        'end_offset': pd.to_timedelta(parse_column(df['end_time'], default=time(0, 0))),
+        'Title': df['event_name'],
+    })
+
+    # Handle Category column (allow variations like 'kategorie')
+    if 'category' in df.columns:
+        templates['Category'] = df['category']
+    elif 'kategorie' in df.columns:
+        templates['Category'] = df['kategorie']
+    else:
+        templates['Category'] = "General"
+
+    templates['Description'] = df['description'].astype(str) if 'description' in df.columns else ''
+    templates['location'] = df['location'] if 'location' in df.columns else None
+
+    # Skip templates that are malformed (e.g., bad time format or missing weekday)
+    return templates.dropna(subset=['weekday', 'start_offset']).reset_index(drop=True)
+
+
+def _expand_weekly_events(templates, dates):
+    """
+    Expands normalized weekly event templates into concrete event instances for the given dates.
+    Instead of scanning the template table once per day, this works column-wise:
+    1. Cross-join the templates with the target dates on the weekday.
+    2. Compute start and end datetimes (including overnight events) with array arithmetic.
+    """
+    # 1. Cross-join the templates with the target dates by weekday
+    days = pd.DataFrame({'date': pd.to_datetime(pd.Series(list(dates), dtype=object))})
+    days['weekday'] = days['date'].dt.weekday
+    instances = days.merge(templates, on='weekday', how='inner')
+
+    if instances.empty:
+        return pd.DataFrame()
+
+    # 2. Combine the concrete dates with the parsed times
+    start = instances['date'] + instances['start_offset']
+    end = instances['date'] + instances['end_offset']
+
+    # Important!: Handle overnight events (e.g., 22:00 to 02:00 next day) and events ending
+    # exactly at midnight: if the end time is not after the start time, it ends on the next day
+    overnight = (instances['end_offset'] <= instances['start_offset']).to_numpy()
+    end = end.where(~overnight, end + pd.Timedelta(days=1))
+
+    return pd.DataFrame({
+        'Title': instances['Title'],
+        'Start': start,
+        'End': end,
+        'Category': instances['Category'],
+        'Description': instances['Description'],
+        'location': instances['location'],
+    })
+
+
+def _read_catalog(file_path):
+    """
+    Reads and normalizes an event catalog file (the slow part: spreadsheet parsing).
+    Returns a dictionary with the catalog 'format' ('weekly' or 'fixed') and the normalized 'frame'.
+    """
+    # Auto-detect file type (.xlsx/.xls for Excel, anything else defaults to CVS)
+    if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
+        df = pd.read_excel(file_path)
+    else:
+        df = pd.read_csv(file_path)
+
+    # Normalize column names (lowercase, strip whitespace) to avoid case-sensitivity issues
+    df.columns = [str(c).lower().strip() for c in df.columns]
+
+    # Check if we have the 'weekly' format (weekday column instead of date)
+    if 'weekday' in df.columns and 'event_name' in df.columns:
+        return {'format': 'weekly', 'frame': _normalize_weekly_templates(df)}
+
+    # Fallback: If the file uses the old structure with fixed dates
+    # Restore the column names expected by the recommender after normalization
+    df = df.rename(columns={'title': 'Title', 'start': 'Start', 'end': 'End',
+                            'category': 'Category', 'description': 'Description'})
+    # For files with pre-defined 'Start' and 'End' columns, ensure they are datetime objects
+    # and remove any potential timezone information (.dt.tz_localize(None))
+    # to allow reliable comparison with busy slots.
+    if 'Start' in df.columns:
+        df['Start'] = pd.to_datetime(df['Start']).dt.tz_localize(None)
+    if 'End' in df.columns:
+        df['End'] = pd.to_datetime(df['End']).dt.tz_localize(None)
+    return {'format': 'fixed', 'frame': df}
+
+
+def get_catalog_fingerprint(file_path):
+    """
+    Returns the fingerprint (modification time and size) that identifies the current version of a catalog file.
+    Raises OSError if the file does not exist.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_catalog(file_path="events.xlsx"):
+    """
+    Returns the normalized event catalog for a file, avoiding spreadsheet parsing whenever possible.
+    Lookup order:
+    1. In-process memory cache (for repeated searches)
+    2. Binary sidecar file next to the catalog (for restarted servers)
+    3. Parsing the spreadsheet itself, which then refreshes both cache tiers
+    Both tiers are keyed on the file fingerprint, so editing the file invalidates them.
+    """
+    path = os.path.abspath(file_path)
+    fingerprint = get_catalog_fingerprint(path)
+
+    # 1. Memory cache
+    cached = _CATALOG_CACHE.get(path)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    # 2. Sidecar file (ignore it if it is stale, unreadable or from an incompatible version)
+    sidecar_path = path + CATALOG_CACHE_SUFFIX
+    catalog = None
+    try:
+        with open(sidecar_path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored.get('fingerprint') == fingerprint:
+            catalog = stored['catalog']
+    except Exception:
+        catalog = None
+
+    # 3. Parse the spreadsheet and persist the result
+    if catalog is None:
+        catalog = _read_catalog(path)
+        try:
+            # Write to a temporary file first so a crash never leaves a half-written sidecar behind
+            tmp_path = sidecar_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'fingerprint': fingerprint, 'catalog': catalog}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, sidecar_path)
+        except OSError:
+            # The cache is only an optimization (e.g., the directory may be read-only)
+            pass
+
+    _CATALOG_CACHE[path] = (fingerprint, catalog)
+    return catalog
+
+
+def clear_catalog_cache():
+    """
+    Empties the in-process catalog cache (sidecar files are revalidated by fingerprint anyway).
+    """
+    _CATALOG_CACHE.clear()
+
+
+def load_local_events(file_path="events.xlsx", window_start=None, window_end=None, stats=None):
     """
     Loads events from the local excel file. 
     The function handles two main formats:
     Fixed dates: Events with defined 'Start' and 'End' datetimes
     Weekly: Events defined by 'weekday' (0= monday, 6 = sunday) and 'start_time'/'end_time'
-    It generates concrete events for the next 30 days.
+    Only events starting inside the planning window (window_start to window_end, both inclusive)
+    are returned. Without an explicit window, it generates concrete events for the next 30 days.
+    The parsed catalog is cached (see load_catalog), so repeated calls skip the spreadsheet parsing.
+    The loading time is recorded as the 'load_catalog' stage of stats (optional PipelineStats).
     """
-    generated_events = []
-    
+    stats = stats if stats is not None else PipelineStats("load")
+
+    # Resolve the planning window (accepts both date and datetime objects)
+    if window_start is None:
+        window_start = datetime.now().date()
+    elif isinstance(window_start, datetime):
+        window_start = window_start.date()
+    if window_end is None:
+        window_end = window_start + timedelta(days=29)
+    elif isinstance(window_end, datetime):
+        window_end = window_end.date()
+
     try:
-        # Auto-detect file type (.xlsx/.xls for Excel, anything else defaults to CVS)
-        if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-            df = pd.read_excel(file_path)
-        else:
-            df = pd.read_csv(file_path)
-        
-        # Normalize column names (lowercase, strip whitespace) to avoid case-sensitivity issues
-        df.columns = [str(c).lower().strip() for c in df.columns]
-        
-        # Check if we have the 'weekly' format (weekday column instead of date)
-        if 'weekday' in df.columns and 'event_name' in df.columns:
-            today = datetime.now().date()
-            
-            # iterate through the next 30 days to generate all potential event instances
-            for i in range(30):
-                current_date = today + timedelta(days=i)
-                current_weekday = current_date.weekday() # 0 = Monday, 6 = Sunday
-                
-                # Filter the source df to find all recurring events scheduled for this specific day 
-                days_events = df[df['weekday'] == current_weekday]
-                
-                for _, row in days_events.iterrows():
-                    try:
-                        # Parse start and end times robustly (handle strings and time objects)
-                        s_val = row['start_time']
-                        e_val = row['end_time']
-                        
-                        # Handle both 'time' objects (from Excel reading) and string representations 
-                        if isinstance(s_val, time): s_time = s_val
-                        else: s_time = pd.to_datetime(str(s_val)).time()
-
-                        if isinstance(e_val, time): e_time = e_val
-                        else: 
-                            try: e_time = pd.to_datetime(str(e_val)).time()
-                            except: e_time = time(0, 0) # Default endtime if parsing fails
-                        
-                        # Combine the concrete date with the parsed time 
-                        start_dt = datetime.combine(current_date, s_time)
-                        
-                        # Important!: Handle overnight events (e.g., 22:00 to 02:00 next day)
-                        if e_time <= s_time and e_time != time(0,0):
-                            # End time is earlier than start time (or equal), so it must end on the next day 
-                             end_dt = datetime.combine(current_date + timedelta(days=1), e_time)
-                        elif e_time == time(0,0): # Ends exactly at midnight
-                            # Handle exact midnight ending: ends on the next day at 00:00:00
-                             end_dt = datetime.combine(current_date + timedelta(days=1), e_time)
-                            # Standard event: ends on the same day 
-                        else:
-                            end_dt = datetime.combine(current_date, e_time)
-
-                        # Handle Category column (allow variations like 'kategorie')
-                        cat = "General"
-                        if 'category' in row: cat = row['category']
-                        elif 'kategorie' in row: cat = row['kategorie']
-
-                        raw_loc = row.get('location')
-                        
-                        # Add the concrete event instance to the list 
-                        generated_events.append({
-                            'Title': row['event_name'],
-                            'Start': start_dt,
-                            'End': end_dt,
-                            'Category': cat, 
-                            'Description': str(row.get('description', '')),
-                            'location': raw_loc
-                        })
-                    except Exception as e:
-                        # Skip processing for individual rows that are malformed (e.g., bad time format)
-                        continue 
-                        
-            return pd.DataFrame(generated_events)
-        
-        # Fallback: If the file uses the old structure with fixed dates
-        else:
-            # For files with pre-defined 'Start' and 'End' columns, ensure they are datetime objects 
-            if 'Start' in df.columns:
-                # Convert to datetime and remove any potential timezone information (.dt.tz_localize(None))
-                # to allow reliable comparison with busy slots. 
-                df['Start'] = pd.to_datetime(df['Start']).dt.tz_localize(None)
-            if 'End' in df.columns:
-                df['End'] = pd.to_datetime(df['End']).dt.tz_localize(None)
-            return df
+        with stats.stage('load_catalog'):
+            catalog = load_catalog(file_path)
+            df = catalog['frame']
+
+            if catalog['format'] == 'weekly':
+                # Generate event instances only for the days inside the planning window
+                target_dates = pd.date_range(window_start, window_end, freq='D').date
+                df = _expand_weekly_events(df, target_dates)
+            else:
+                # Fixed dates: keep only the events that start inside the planning window
+                if 'Start' in df.columns:
+                    start_dates = df['Start'].dt.date
+                    df = df[(start_dates >= window_start) & (start_dates <= window_end)]
+                # Return a copy so callers can never modify the cached catalog
+                df = df.reset_index(drop=True)
+        stats.set('catalog_events', len(df))
+        return df
 
     except Exception as e:
         print(f"Error loading file: {e}")
         return pd.DataFrame()
 
+# --- SQLite-backed event catalog ---
+
+# ISO format used for event times stored in the database (lexicographically sortable)
+DB_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _frame_to_rows(df, columns):
+    """
+    Converts the given DataFrame columns into a list of tuples for executemany (NaN becomes NULL).
+    """
+    values = df[columns].astype(object)
+    return list(values.where(values.notna(), None).itertuples(index=False, name=None))
+
+
+def sync_catalog_to_db(file_path="events.xlsx"):
+    """
+    Imports the catalog file into the database if it changed since the last import.
+    Uses the file fingerprint to detect changes and the cached parser (load_catalog) to read it.
+    Returns the catalog format ('weekly' or 'fixed').
+    """
+    source = os.path.abspath(file_path)
+    fingerprint = "{}:{}".format(*get_catalog_fingerprint(source))
+    state = database.get_catalog_state()
+    if state.get("source") == source and state.get("fingerprint") == fingerprint:
+        return state.get("format")
+
+    catalog = load_catalog(file_path)
+    df = catalog['frame'].copy()
+
+    if catalog['format'] == 'weekly':
+        # Store the time offsets as seconds after midnight
+        df['weekday'] = df['weekday'].astype(int)
+        df['start_offset'] = df['start_offset'].dt.total_seconds().astype(int)
+        df['end_offset'] = df['end_offset'].dt.total_seconds().astype(int)
+        templates = _frame_to_rows(df, ['Title', 'weekday', 'start_offset', 'end_offset', 'Category', 'Description', 'location'])
+        database.import_event_catalog(source, fingerprint, 'weekly', templates=templates)
+    else:
+        # Fixed dates are already concrete instances and go straight into the events table
+        for col in ['Category', 'Description', 'location']:
+            if col not in df.columns:
+                df[col] = None
+        df = df.dropna(subset=['Start', 'End'])
+        df['weekday'] = df['Start'].dt.weekday
+        df['Start'] = df['Start'].dt.strftime(DB_TIME_FORMAT)
+        df['End'] = df['End'].dt.strftime(DB_TIME_FORMAT)
+        events = _frame_to_rows(df, ['Title', 'Start', 'End', 'weekday', 'Category', 'Description', 'location'])
+        database.import_event_catalog(source, fingerprint, 'fixed', events=events)
+
+    return catalog['format']
+
+
+def _materialize_days(days):
+    """
+    Expands the stored weekly templates into concrete instances for the given days
+    (only the days that are not materialized yet) and stores them in the database.
+    """
+    day_keys = [d.isoformat() for d in days]
+    done = database.get_materialized_days(day_keys)
+    missing = [d for d, key in zip(days, day_keys) if key not in done]
+    if not missing:
+        return
+
+    # Only fetch the templates for the weekdays we actually need
+    rows = database.get_event_templates({d.weekday() for d in missing})
+    templates = pd.DataFrame(rows, columns=['Title', 'weekday', 'start_offset', 'end_offset', 'Category', 'Description', 'location'])
+    templates['start_offset'] = pd.to_timedelta(templates['start_offset'], unit='s')
+    templates['end_offset'] = pd.to_timedelta(templates['end_offset'], unit='s')
+
+    instances = _expand_weekly_events(templates, missing)
+    events = []
+    if not instances.empty:
+        instances['weekday'] = instances['Start'].dt.weekday
+        instances['Start'] = instances['Start'].dt.strftime(DB_TIME_FORMAT)
+        instances['End'] = instances['End'].dt.strftime(DB_TIME_FORMAT)
+        events = _frame_to_rows(instances, ['Title', 'Start', 'End', 'weekday', 'Category', 'Description', 'location'])
+
+    database.add_event_instances([d.isoformat() for d in missing], events)
+
+
+def load_catalog_events(window_start, window_end, file_path="events.xlsx", stats=None):
+    """
+    Loads the catalog events starting inside the planning window (both dates inclusive) from the database.
+    The catalog file is imported on first use (or after it changed), weekly templates are materialized
+    once per day, and the window itself is fetched with a single indexed range query.
+    Returns the same Title/Start/End/Category/Description/location frame as load_local_events.
+    The import and the query are timed as the 'catalog_sync' and 'catalog_query' stages of stats.
+    """
+    stats = stats if stats is not None else PipelineStats("load")
+    if isinstance(window_start, datetime):
+        window_start = window_start.date()
+    if isinstance(window_end, datetime):
+        window_end = window_end.date()
+
+    try:
+        with stats.stage('catalog_sync'):
+            catalog_format = sync_catalog_to_db(file_path)
+            if catalog_format == 'weekly':
+                _materialize_days(list(pd.date_range(window_start, window_end, freq='D').date))
+
+        with stats.stage('catalog_query'):
+            # Half-open range: from the first day at midnight up to the day after the window
+            rows = database.get_events_in_range(
+                datetime.combine(window_start, time(0, 0)).strftime(DB_TIME_FORMAT),
+                datetime.combine(window_end + timedelta(days=1), time(0, 0)).strftime(DB_TIME_FORMAT),
+            )
+            df = pd.DataFrame(rows, columns=['Title', 'Start', 'End', 'Category', 'Description', 'location'])
+            df['Start'] = pd.to_datetime(df['Start'])
+            df['End'] = pd.to_datetime(df['End'])
+        stats.set('catalog_events', len(df))
+        return df
+
+    except Exception as e:
+        print(f"Error loading catalog: {e}")
+        return pd.DataFrame()
+
 # --- Availability Check ---
 
 def check_user_availability(event_start, event_end, user_busy_slots):
@@ -110,7 +375,12 @@ def check_user_availability(event_start, event_end, user_busy_slots):
     Checks if a single user is free during the event time.
     Function uses the standard interval overlap check
     Returns False if ANY of their busy slots overlap with the event.
+    The busy slots can be a list of slot dictionaries, BusySlots (one vectorized check over the epoch arrays)
+    or a prebuilt BusyIndex (binary search).
     """
+    if isinstance(user_busy_slots, (BusyIndex, BusySlots)):
+        return user_busy_slots.is_free(event_start, event_end)
+
     for busy in user_busy_slots:
         # Remove timezone info for comparison (ensures datetimes are timezone-naive)
         b_start = busy['start'].replace(tzinfo=None)
@@ -124,138 +394,610 @@ def check_user_availability(event_start, event_end, user_busy_slots):
 
 # --- Core recommendation engine (scoring and ranking) ---
 
-def find_best_slots_for_group(events_df, user_busy_map, selected_users, all_user_prefs, min_attendees=1):
+def _event_texts(df):
     """
-    Function calculates two primary scores for each event: 
-    1. Availability Score: How many of the total group can attend (0.0 to 1.0)
-    2. Interest Score: How well the event matches the attendees preferences (0.0 to 1.0)
-    It the combines these two into a final 'sort_score' for ranking 
+    Builds the searchable text of each event (category, description and title) for keyword matching.
     """
-    if events_df.empty:
-        return pd.DataFrame()
+    def column(name):
+        if name not in df.columns:
+            return pd.Series('', index=df.index)
+        return df[name].astype(object).map(str)
 
-    results = []
-    total_group_size = len(selected_users) if selected_users else 1
+    return (column('Category') + " " + column('Description') + " " + column('Title')).tolist()
 
-    for _, event in events_df.iterrows():
-        attendees = []
-        
-        # 1. Availability Check: Who is free?
+
+def _event_features(df):
+    """
+    Combines the descriptive fields of each event into one text (the corpus for the TF-IDF model).
+    """
+    return (
+        df['Title'].fillna('').astype(str) + " " +
+        df['Category'].fillna('').astype(str) + " " +
+        df['Description'].fillna('').astype(str)
+    )
+
+
+# --- Common free time (open-ended planning) ---
+
+def find_common_free_windows(user_busy_map, selected_users, window_start, window_end, min_free=None,
+                             min_duration=timedelta(minutes=60), daily_hours=None):
+    """
+    Answers "when are all (or at least min_free) of us free?" without needing catalog events.
+    Runs a single sweep over all busy endpoints of the selected users (see availability.sweep_free_windows).
+    A window is a maximal interval in which at least min_free users are free at every moment,
+    even if who is free changes inside it.
+    Args:
+        user_busy_map (dict): Mapping of user name -> busy slots (BusySlots or a list of slot dictionaries).
+        selected_users (list): The group.
+        window_start, window_end (date/datetime): The search window (dates are inclusive whole days).
+        min_free (int): Minimum number of free users (default: everybody).
+        min_duration (timedelta): Shorter free windows are dropped.
+        daily_hours (tuple): Optional (earliest, latest) time objects; time outside them is never suggested.
+    Returns:
+        list: Dictionaries with 'start', 'end', 'free_users' (free for the whole window) and 'free_count'
+        (fewest free users at any moment of the window), in chronological order.
+    """
+    selected_users = list(selected_users)
+    if not selected_users:
+        return []
+    if min_free is None:
+        min_free = len(selected_users)
+
+    # Dates mean whole days: the window ends at midnight after the last day
+    if not isinstance(window_start, datetime):
+        window_start = datetime.combine(window_start, time(0, 0))
+    if not isinstance(window_end, datetime):
+        window_end = datetime.combine(window_end + timedelta(days=1), time(0, 0))
+
+    # Block the time outside the daily hours (e.g., nights) for everybody
+    blocked = []
+    if daily_hours:
+        earliest, latest = daily_hours
+        day = window_start.date()
+        while day <= window_end.date():
+            day_start = datetime.combine(day, time(0, 0))
+            blocked.append((to_epoch(day_start), to_epoch(datetime.combine(day, earliest))))
+            blocked.append((to_epoch(datetime.combine(day, latest)), to_epoch(day_start + timedelta(days=1))))
+            day += timedelta(days=1)
+
+    busy_indexes = [BusyIndex.from_slots(user_busy_map.get(user, [])) for user in selected_users]
+    windows = sweep_free_windows(busy_indexes, to_epoch(window_start), to_epoch(window_end), min_free, blocked)
+
+    min_length = min_duration // timedelta(microseconds=1)
+    return [
+        {
+            'start': from_epoch(start),
+            'end': from_epoch(end),
+            'free_users': [selected_users[u] for u in free_users],
+            'free_count': fewest_free,
+        }
+        for start, end, free_users, fewest_free in windows
+        if end - start >= min_length
+    ]
+
+
+# --- Parallel scoring (process pool) ---
+
+# Number of worker processes used for scoring (0 or 1 = serial), configurable via environment variable
+SCORING_WORKERS = int(os.environ.get("MEETLY_SCORING_WORKERS", "0"))
+
+# Below this many events, starting worker processes costs more than it saves
+PARALLEL_MIN_EVENTS = 2000
+
+# --- Availability backends ---
+# 'exact': binary search against each user's merged busy intervals (default)
+# 'bitmap': busy time rasterized into a time grid (uint64 words), checked with bitwise AND
+# 'auto': 'bitmap' for large groups with dense calendars, 'exact' otherwise
+AVAILABILITY_BACKEND = "exact"
+BITMAP_RESOLUTION_MINUTES = 15
+BITMAP_MIN_USERS = 20
+BITMAP_MIN_BUSY_SLOTS = 200  # average busy slots per user
+
+# Cache of ranked results, so re-running the same search (same catalog, group, preferences and
+# busy times) is served without rescoring. The app enables the persistent SQLite tier on startup.
+RESULT_CACHE_SIZE = 32
+RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE)
+
+# Busy indexes and preference matcher of the current search, installed once per worker process
+_worker_state = {}
+
+
+def _init_scoring_worker(busy_arrays, all_user_prefs):
+    """
+    Process pool initializer: receives the busy data and preferences once per worker
+    (instead of once per chunk) and rebuilds the lookup structures.
+    """
+    _worker_state['busy_indexes'] = {user: BusyIndex(starts, ends) for user, (starts, ends) in busy_arrays.items()}
+    _worker_state['matcher'] = PreferenceMatcher(all_user_prefs) if all_user_prefs is not None else None
+
+
+def _score_event_chunk(event_starts, event_ends, event_texts):
+    """
+    Scores one shard of events inside a worker process.
+    Returns (availability vectors per user for the shard, keyword hits {user: tags} per event or None).
+    """
+    free = {user: free_mask(index, event_starts, event_ends) for user, index in _worker_state['busy_indexes'].items()}
+    matcher = _worker_state['matcher']
+    hits = [matcher.user_tags(text) for text in event_texts] if matcher is not None else None
+    return free, hits
+
+
+def _best_subgroups(free_matrix, happy_matrix, min_size):
+    """
+    Picks for every event the attendee subset of at least min_size free users that maximizes the
+    interest score (share of attendees who like the event), without enumerating combinations:
+    - if at least min_size free users like the event, the subgroup is exactly those users (score 1.0)
+    - otherwise all users who like it are invited and the remaining places are filled with other
+      free users (in selection order), which gives the best possible score of happy / min_size
+    Returns the boolean events x users matrix of the chosen subgroups.
+    """
+    missing = np.maximum(min_size - happy_matrix.sum(axis=1), 0)
+    others = free_matrix & ~happy_matrix
+    # Number the other free users per event and take the first 'missing' ones
+    fill = others & (np.cumsum(others, axis=1) <= missing[:, None])
+    return happy_matrix | fill
+
+
+class RecommendationSession:
+    """
+    Caches the per-user work of a search for one planning window and catalog version:
+    - availability vectors: which events each user is free for
+    - keyword hits: which events each user likes (and the matched tags)
+    Changing the selected group only combines the cached vectors and recomputes the cheap aggregate scores.
+    A new session is needed when the events, the busy data or the preferences change.
+    """
+
+    def __init__(self, events_df, user_busy_map, all_user_prefs, workers=None, availability_backend=None):
+        """
+        Args:
+            events_df (DataFrame): The catalog events of the planning window.
+            user_busy_map (dict): Mapping of user name -> busy slots (BusySlots or a list of slot dictionaries).
+            all_user_prefs (dict): Mapping of user name -> comma-separated preference string.
+            workers (int): Number of worker processes for large catalogs (default: SCORING_WORKERS).
+            availability_backend (str): 'exact', 'bitmap' or 'auto' (default: AVAILABILITY_BACKEND).
+        """
+        self.events_df = events_df
+        self.user_busy_map = user_busy_map
+        self.all_user_prefs = dict(all_user_prefs)
+        self.workers = SCORING_WORKERS if workers is None else workers
+        self.availability_backend = availability_backend or AVAILABILITY_BACKEND
+        self._bitmap_grid = None
+        self._bitmap_masks = None
+
+        # Per-event data shared by all users (computed once)
+        if not events_df.empty:
+            self._event_starts = series_to_epoch(events_df['Start'])
+            self._event_ends = series_to_epoch(events_df['End'])
+            self._event_texts = _event_texts(events_df)
+            self._event_features = _event_features(events_df)
+
+        self._free = {'exact': {}, 'bitmap': {}}  # backend -> user -> boolean vector over the events (True = free)
+        self._likes = {}      # user -> boolean vector over the events (True = keyword hit)
+        self._tags = {}       # user -> {event position: set of matched tags}
+        self._no_likes = None  # shared all-False vector for users without preferences
+        self._semantic_model = None
+        self._busy = {}        # user -> BusyIndex
+        self._busy_digests = {}  # user -> digest of the busy time inside the planning window
+        self._catalog_digest = None
+
+    def busy_index(self, user):
+        """
+        Returns the cached BusyIndex (merged, sorted busy intervals) of a user.
+        """
+        index = self._busy.get(user)
+        if index is None:
+            index = BusyIndex.from_slots(self.user_busy_map.get(user, []))
+            self._busy[user] = index
+        return index
+
+    def availability(self, user, backend='exact'):
+        """
+        Returns the cached availability vector of a user for the given backend
+        (exact vectors are built with a BusyIndex on first use, bitmap vectors in _prepare).
+        """
+        free = self._free[backend].get(user)
+        if free is None:
+            free = free_mask(self.busy_index(user), self._event_starts, self._event_ends)
+            self._free['exact'][user] = free
+        return free
+
+    def interest(self, user):
+        """
+        Returns the cached keyword hits of a user: (boolean vector over the events, {event position: tags}).
+        The hits of all users are computed together with one keyword scan per event.
+        """
+        if self._no_likes is None:
+            self._scan_preferences()
+        return self._likes.get(user, self._no_likes), self._tags.get(user, {})
+
+    def _scan_preferences(self):
+        """
+        Scans every event text once with a matcher over all users' preferences and stores the hits per user.
+        """
+        matcher = PreferenceMatcher(self.all_user_prefs)
+        self._store_hits([matcher.user_tags(event_text) for event_text in self._event_texts])
+
+    def _store_hits(self, hits):
+        """
+        Stores the keyword hits ({user: tags} per event, in event order) as per-user vectors.
+        """
+        n_events = len(self.events_df)
+        self._no_likes = np.zeros(n_events, dtype=bool)
+        for user in self.all_user_prefs:
+            self._likes[user] = np.zeros(n_events, dtype=bool)
+            self._tags[user] = {}
+
+        for pos, user_tags in enumerate(hits):
+            for user, tags in user_tags.items():
+                self._likes[user][pos] = True
+                self._tags[user][pos] = tags
+
+    def _prepare(self, users, backend='exact'):
+        """
+        Makes sure the availability (for the given backend) and interest data of the given users is cached.
+        Large catalogs are scored in parallel (see _score_in_parallel), small ones lazily in this process.
+        """
+        missing = [user for user in dict.fromkeys(users) if user not in self._free[backend]]
+        if missing and backend == 'bitmap':
+            self._score_with_bitmaps(missing)
+            missing = []
+
+        need_interest = self._no_likes is None
+        if (missing or need_interest) and self.workers > 1 and len(self.events_df) >= PARALLEL_MIN_EVENTS:
+            self._score_in_parallel(missing, need_interest)
+
+    def resolve_backend(self, users):
+        """
+        Returns the availability backend ('exact' or 'bitmap') used for the given group.
+        With 'auto' the choice only depends on the group and its busy data, so the same search
+        always gets the same (exact or conservative) availability, whatever was ranked before.
+        """
+        if self.availability_backend in ('exact', 'bitmap'):
+            return self.availability_backend
+        users = list(dict.fromkeys(users))
+        if self.availability_backend != 'auto' or len(users) < BITMAP_MIN_USERS:
+            return 'exact'
+        busy_slots = sum(len(self.user_busy_map.get(user, [])) for user in users)
+        return 'bitmap' if busy_slots / len(users) >= BITMAP_MIN_BUSY_SLOTS else 'exact'
+
+    def _score_with_bitmaps(self, users):
+        """
+        Computes the availability vectors of the given users with the time-grid bitmap backend:
+        all users' busy time is rasterized once and every event is checked with a bitwise AND.
+        """
+        if self._bitmap_grid is None:
+            # The grid covers every day from the first event start to the last event end
+            first_day = self.events_df['Start'].min().date()
+            last_day = self.events_df['End'].max().date()
+            days = (last_day - first_day).days + 1
+            self._bitmap_grid = BusyBitmap(first_day, days, BITMAP_RESOLUTION_MINUTES)
+            self._bitmap_masks = self._bitmap_grid.event_masks(self._event_starts, self._event_ends)
+
+        busy_words = self._bitmap_grid.rasterize(
+            [self.busy_index(user) for user in users]
+        )
+        matrix = self._bitmap_grid.free_matrix(self._bitmap_masks, busy_words)
+        for j, user in enumerate(users):
+            self._free['bitmap'][user] = matrix[:, j]
+
+    def _score_in_parallel(self, users, need_interest):
+        """
+        Shards the events into chunks and scores availability (for the given users) and keyword
+        interest (for all users, if needed) in a process pool. The busy data is sent to each worker
+        only once through the pool initializer. The merged vectors are identical to the serial path.
+        """
+        # Send compact epoch arrays instead of the slot dictionaries
+        busy_arrays = {}
+        for user in users:
+            index = self.busy_index(user)
+            busy_arrays[user] = (index.starts, index.ends)
+
+        # A few chunks per worker keeps all workers busy even if chunks take different times
+        chunks = [c for c in np.array_split(np.arange(len(self.events_df)), self.workers * 4) if len(c)]
+        free_parts = {user: [] for user in users}
+        hits = []
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_scoring_worker,
+                                 initargs=(busy_arrays, self.all_user_prefs if need_interest else None)) as pool:
+            futures = [
+                pool.submit(_score_event_chunk, self._event_starts[c], self._event_ends[c],
+                            [self._event_texts[i] for i in c])
+                for c in chunks
+            ]
+            # Merge the shards in their original order
+            for future in futures:
+                chunk_free, chunk_hits = future.result()
+                for user in users:
+                    free_parts[user].append(chunk_free[user])
+                if need_interest:
+                    hits.extend(chunk_hits)
+
+        for user in users:
+            self._free['exact'][user] = np.concatenate(free_parts[user])
+        if need_interest:
+            self._store_hits(hits)
+
+    @property
+    def semantic_model(self):
+        """
+        The TF-IDF model of the catalog (fitted once per catalog version, see scoring.get_semantic_model).
+        """
+        if self._semantic_model is None:
+            self._semantic_model = get_semantic_model(self._event_features)
+        return self._semantic_model
+
+    def cache_key(self, selected_users, min_attendees=1, subgroup=False):
+        """
+        Returns a stable digest of everything a ranking depends on: the catalog version (the events
+        of the window), the selected users, their preferences, each user's busy time within the
+        window, the group size settings and the availability backend resolved for the group.
+        """
+        if self._catalog_digest is None:
+            self._catalog_digest = make_cache_key(
+                pd.util.hash_pandas_object(self.events_df, index=False).to_numpy().tobytes())
+
+        window_start = int(self._event_starts.min())
+        window_end = int(self._event_ends.max())
+        users = []
         for user in selected_users:
-            busy_slots = user_busy_map.get(user, [])
-            if check_user_availability(event['Start'], event['End'], busy_slots):
-                attendees.append(user) # User is free
-        
+            digest = self._busy_digests.get(user)
+            if digest is None:
+                # Only the busy intervals touching the window can change the result
+                index = self.busy_index(user)
+                inside = (index.ends >= window_start) & (index.starts <= window_end)
+                digest = make_cache_key(index.starts[inside].tobytes(), index.ends[inside].tobytes())
+                self._busy_digests[user] = digest
+            users.append((user, self.all_user_prefs.get(user, ""), digest))
+
+        return make_cache_key(self._catalog_digest, window_start, window_end, users,
+                              int(min_attendees), bool(subgroup), self.resolve_backend(selected_users))
+
+    def rank(self, selected_users, min_attendees=1, subgroup=False, use_cache=True, stats=None):
+        """
+        Ranks the events for the selected group (see _rank). Results are served from RESULT_CACHE
+        when the same search was run before, unless use_cache=False.
+        The stage timings are recorded in stats (or a new PipelineStats) and returned as the .stats of the results.
+        """
+        stats = stats if stats is not None else PipelineStats("rank")
+        if self.events_df.empty or not use_cache:
+            return self._rank(selected_users, min_attendees, subgroup, stats)
+
+        selected_users = list(selected_users)
+        with stats.stage('cache_lookup'):
+            key = self.cache_key(selected_users, min_attendees, subgroup)
+            cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            stats.count('cache_hits')
+            return RankedResults(cached.frame, cached.scores, stats)
+
+        ranked = self._rank(selected_users, min_attendees, subgroup, stats)
+        with stats.stage('cache_store'):
+            RESULT_CACHE.put(key, selected_users, ranked)
+        return ranked
+
+    def _rank(self, selected_users, min_attendees=1, subgroup=False, stats=None):
+        """
+        Function calculates two primary scores for each event: 
+        1. Availability Score: How many of the total group can attend (0.0 to 1.0)
+        2. Interest Score: How well the event matches the attendees preferences (0.0 to 1.0)
+        It the combines these two into a final 'sort_score' for ranking 
+        With subgroup=True, the attendees of each event are not everybody who is free, but the
+        subgroup of at least min_attendees people that maximizes the interest score (see _best_subgroups).
+        Returns a RankedResults object, which produces the best results page by page (.head(n)).
+        The time of every stage is recorded in stats (a PipelineStats, created if not given).
+        """
+        stats = stats if stats is not None else PipelineStats("rank")
+        if self.events_df.empty:
+            return RankedResults(pd.DataFrame(), [], stats)
+
+        selected_users = list(selected_users)
+        total_group_size = len(selected_users) if selected_users else 1
+        n_events = len(self.events_df)
+        stats.set('events', n_events)
+        stats.set('users', len(selected_users))
+        backend = self.resolve_backend(selected_users)
+        with stats.stage('prepare'):
+            self._prepare(selected_users, backend)
+
+        # 1. Availability Check: Who is free?
+        # Combine the cached availability vectors into the events x users free-matrix
+        with stats.stage('availability'):
+            free_matrix = np.zeros((n_events, len(selected_users)), dtype=bool)
+            for j, user in enumerate(selected_users):
+                free_matrix[:, j] = self.availability(user, backend)
+            attendee_counts = free_matrix.sum(axis=1)
+
         # Only process events where enough people are free
-        # Skip the event if it doesn't meet the minimum attendance thershold
-        if len(attendees) >= min_attendees:
-            
-            # 2. Interest Analysis (Detail Check PER PERSON)
-            attendee_prefs_list = []
-            matched_tags = set()
-            
-            # Create a searchable text string from the event's metadata 
-            event_text = (str(event.get('Category', '')) + " " + str(event.get('Description', '')) + " " + str(event['Title'])).lower()
-            
-            # Counter for happy users
-            happy_user_count = 0
-            
-            for attendee in attendees:
-                u_prefs = all_user_prefs.get(attendee, "")
-                attendee_prefs_list.append(u_prefs)
-                
-                # Check if THIS user likes the event
-                user_likes_event = False
-                # Iterate through user's preference keywords (split by comma)
-                for pref in u_prefs.split(','):
-                    clean_pref = pref.strip()
-                    # Check for direct keyword match (e.g., "Sport" in event text)
-                    if clean_pref and clean_pref.lower() in event_text:
-                        matched_tags.add(clean_pref)
-                        user_likes_event = True
-                        # Optimization: once a match is found for a user, stop checking their other preferences
-                
-                if user_likes_event:
-                    happy_user_count += 1
+        # Skip the events that don't meet the minimum attendance thershold
+        qualifying = np.flatnonzero(attendee_counts >= min_attendees)
+        stats.set('qualifying_events', len(qualifying))
+        if len(qualifying) == 0:
+            return RankedResults(pd.DataFrame(), [], stats)
+
+        free_matrix = free_matrix[qualifying]
+        attendee_counts = attendee_counts[qualifying]
+
+        # 2. Interest Analysis (Detail Check PER PERSON)
+        # A user is happy with an event if they are free AND it matches one of their keywords
+        with stats.stage('interest'):
+            likes_matrix = np.zeros_like(free_matrix)
+            for j, user in enumerate(selected_users):
+                likes_matrix[:, j] = self.interest(user)[0][qualifying]
+            happy_matrix = free_matrix & likes_matrix
+            happy_counts = happy_matrix.sum(axis=1)
+
+            if subgroup:
+                # Only invite the best subgroup instead of everybody who is free
+                free_matrix = _best_subgroups(free_matrix, happy_matrix, min_attendees)
+                attendee_counts = free_matrix.sum(axis=1)
+
+            # The per-event results are collected as parallel columns (no per-row Series copies)
+            attendees_col = []
+            prefs_col = []
+            tags_col = []
+            # Many events share the same set of free users, so the attendee texts are built once per set
+            group_texts = {}
+            for i, pos in enumerate(qualifying):
+                pattern = free_matrix[i].tobytes()
+                texts = group_texts.get(pattern)
+                if texts is None:
+                    attendees = [user for user, free in zip(selected_users, free_matrix[i]) if free]
+                    texts = (", ".join(attendees), " ".join(self.all_user_prefs.get(attendee, "") for attendee in attendees))
+                    group_texts[pattern] = texts
 
-            # --- SCORE CALCULATION ---
-            
+                matched_tags = set()
+                if happy_counts[i]:
+                    for j in np.flatnonzero(happy_matrix[i]):
+                        matched_tags.update(self._tags[selected_users[j]][pos])
+
+                attendees_col.append(texts[0])
+                prefs_col.append(texts[1])
+                tags_col.append(", ".join(sorted(matched_tags)) if matched_tags else "General")
+
+        # --- SCORE CALCULATION ---
+        # Join all computed metrics to the qualifying events in one step
+        result_df = self.events_df.iloc[qualifying].assign(
+            attendees=attendees_col,
+            attendee_count=attendee_counts,
+            group_prefs_text=prefs_col,
+            matched_tags=tags_col,
             # Interest Score: What percentage of the ATTENDEES like this event?
-            # Example: If 2 people go, and 1 likes it -> 50% (0.5)
-            interest_score = happy_user_count / len(attendees) if len(attendees) > 0 else 0
-            
+            # Example: If 2 people go, and 1 likes it -> 50% (0.5); 0 if nobody can attend
+            interest_score=np.divide(happy_counts, attendee_counts, out=np.zeros(len(attendee_counts)),
+                                     where=attendee_counts > 0),
             # Availability Score: What percentage of the TOTAL GROUP can make it?
             # Example: If 3 out of 4 people are free -> 75% (0.75)
-            availability_score = len(attendees) / total_group_size if total_group_size > 0 else 0
-
-            # Store computed metrics
-            event_entry = event.copy()
-            event_entry['attendees'] = ", ".join(attendees)
-            event_entry['attendee_count'] = len(attendees)
-            event_entry['group_prefs_text'] = " ".join(attendee_prefs_list)
-            event_entry['matched_tags'] = ", ".join(matched_tags) if matched_tags else "General"
-            
-            # Save the separated scores
-            event_entry['interest_score'] = interest_score
-            event_entry['availability_score'] = availability_score
-            
-            results.append(event_entry)
-
-    if not results:
-        return pd.DataFrame()
+            availability_score=attendee_counts / total_group_size,
+        )
 
-    result_df = pd.DataFrame(results)
+        # 3. Machine Learning Score (TF-IDF) as Fallback
+        # We use TF-IDF to find matches even if exact keywords are missing,
+        # but we prioritize our manual 'interest_score' if it found direct hits.
 
-    # 3. Machine Learning Score (TF-IDF) as Fallback
-    # We use TF-IDF to find matches even if exact keywords are missing,
-    # but we prioritize our manual 'interest_score' if it found direct hits.
-
-    # Text corpus for ML training: combine all descriptive fields 
-    result_df['event_features'] = (
-        result_df['Title'].fillna('') + " " + 
-        result_df['Category'].fillna('') + " " +  
-        result_df['Description'].fillna('')
-    )
-    
-    try:
-        tfidf = TfidfVectorizer(stop_words='english')
+        # Text corpus for ML training: combine all descriptive fields 
+        result_df['event_features'] = self._event_features.to_numpy()[qualifying]
         
-        # TF-IDF needs at least 2 documents to work effectively
-        if len(result_df) >= 2:
-            # Train the vectorizer on all events
-            tfidf_matrix = tfidf.fit_transform(result_df['event_features'])
-            
-            ml_scores = []
-            for idx, row in result_df.iterrows():
-                # If we already have a manual hit (>0), trust it.
-                if row['interest_score'] > 0:
-                    ml_scores.append(row['interest_score'])
-                # If no manual match, use the semantic similarity score from TF-IDF
+        with stats.stage('tfidf'):
+            try:
+                # TF-IDF needs at least 2 documents to work effectively
+                if len(result_df) >= 2:
+                    # If we already have a manual hit (>0), trust it.
+                    # If no manual match, use the semantic similarity score from TF-IDF
+                    # (cosine similarity between the group's combined preferences and the event)
+                    manual_scores = result_df['interest_score'].to_numpy(dtype=float)
+                    ml_scores = manual_scores.copy()
+                    fallback = manual_scores <= 0
+                    stats.set('tfidf_rows', int(fallback.sum()))
+                    if fallback.any():
+                        ml_scores[fallback] = self.semantic_model.similarities(
+                            result_df['event_features'].to_numpy()[fallback],
+                            result_df['group_prefs_text'].to_numpy()[fallback],
+                        )
+                
+                    result_df['final_interest_score'] = ml_scores
                 else:
-                    # Transform the group's combined preferences into a vector 
-                    user_vector = tfidf.transform([row['group_prefs_text']])
-                    # Cosine similarity measures the angular distance (similarity) between the user vector and the event vector 
-                    sim = cosine_similarity(user_vector, tfidf_matrix[idx])
-                    ml_scores.append(sim[0][0])
-            
-            result_df['final_interest_score'] = ml_scores
-        else:
-             # Fallback for single event case: trust manual score, otherwise default to a neutral score (0.5)
-             val = result_df.iloc[0]['interest_score']
-             result_df['final_interest_score'] = val if val > 0 else 0.5
-            
-    except Exception as e:
-        print(f"ML Error: {e}") 
-        # If the ML process fails unexpectedly, fall back entirely to the manual score
-        result_df['final_interest_score'] = result_df['interest_score']
-
-    # 4. Ranking and Sorting
-    # We create a combined score to sort the best options to the top.
-    # A score of 2.0 means 100% attendance and 100% interest match
-    # Both availability and interest are weighted equally here.
-    result_df['sort_score'] = result_df['availability_score'] + result_df['final_interest_score']
-
-    # Sort the results so the highest-scoring events (best fit) appear at the top 
-    result_df = result_df.sort_values(by=['sort_score'], ascending=[False])
-    
-    return result_df
+                     # Fallback for single event case: trust manual score, otherwise default to a neutral score (0.5)
+                     val = result_df.iloc[0]['interest_score']
+                     result_df['final_interest_score'] = val if val > 0 else 0.5
+                
+            except Exception as e:
+                print(f"ML Error: {e}") 
+                stats.count('ml_errors')
+                # If the ML process fails unexpectedly, fall back entirely to the manual score
+                result_df['final_interest_score'] = result_df['interest_score']
+
+        # 4. Ranking and Sorting
+        # We create a combined score to sort the best options to the top.
+        # A score of 2.0 means 100% attendance and 100% interest match
+        # Both availability and interest are weighted equally here.
+        with stats.stage('ranking'):
+            result_df['sort_score'] = result_df['availability_score'] + result_df['final_interest_score']
+
+            # Rank the results lazily: the highest-scoring events (best fit) are only selected and sorted when requested
+            return RankedResults(result_df, result_df['sort_score'].to_numpy(), stats)
+
+
+def rank_best_slots_for_group(events_df, user_busy_map, selected_users, all_user_prefs, min_attendees=1, workers=None,
+                              availability_backend=None, subgroup=False, use_cache=True, stats=None):
+    """
+    Scores and ranks the events for a group in a one-off RecommendationSession.
+    Returns a RankedResults object, which produces the best results page by page (.head(n));
+    its .stats hold the stage timings.
+    """
+    session = RecommendationSession(events_df, user_busy_map, all_user_prefs, workers=workers,
+                                    availability_backend=availability_backend)
+    return session.rank(selected_users, min_attendees, subgroup, use_cache, stats)
+
+
+def find_best_slots_for_group(events_df, user_busy_map, selected_users, all_user_prefs, min_attendees=1, top_k=None, workers=None,
+                              availability_backend=None, subgroup=False, use_cache=True, stats=None):
+    """
+    Scores and ranks the events for a group (see RecommendationSession.rank for the scoring details).
+    Returns a DataFrame sorted by 'sort_score' (best first). With top_k, only the top_k rows are
+    selected (partial selection), so the full result list is never sorted.
+    With workers > 1, large catalogs are scored in a process pool (same results as the serial path).
+    availability_backend selects how free time is checked ('exact', 'bitmap' or 'auto').
+    With subgroup=True, each event gets the best subgroup of at least min_attendees people.
+    Repeated searches are served from the result cache (RESULT_CACHE) unless use_cache=False.
+    Pass a PipelineStats as stats to collect the timings of every stage.
+    """
+    ranked = rank_best_slots_for_group(events_df, user_busy_map, selected_users, all_user_prefs, min_attendees, workers,
+                                       availability_backend, subgroup, use_cache, stats)
+    return ranked.head(len(ranked) if top_k is None else top_k)
+
+
+# --- Multi-week planning ---
+
+def split_results_by_week(ranked, first_week, weeks):
+    """
+    Splits ranked results into one RankedResults per week (in chronological order).
+    Args:
+        ranked (RankedResults): Results covering the whole horizon.
+        first_week (date): Monday of the first week.
+        weeks (int): Number of weeks.
+    Returns:
+        dict: Monday of each week -> RankedResults of the events starting in that week.
+    """
+    week_starts = [first_week + timedelta(weeks=w) for w in range(weeks)]
+    if ranked.empty:
+        return {week: RankedResults(pd.DataFrame(), [], ranked.stats) for week in week_starts}
+
+    frame = ranked.frame
+    # Week number of every event, counted from the first Monday
+    offsets = (frame['Start'].dt.normalize() - pd.Timestamp(first_week)).dt.days.to_numpy() // 7
+    by_week = {}
+    for w, week in enumerate(week_starts):
+        in_week = offsets == w
+        by_week[week] = (RankedResults(frame[in_week], ranked.scores[in_week], ranked.stats) if in_week.any()
+                         else RankedResults(pd.DataFrame(), [], ranked.stats))
+    return by_week
+
+
+def plan_horizon(user_busy_map, selected_users, all_user_prefs, start_date, weeks=4, file_path="events.xlsx",
+                 min_attendees=1, subgroup=False, workers=None, availability_backend=None, use_cache=True, stats=None,
+                 session=None):
+    """
+    Scores N weeks in one pass instead of N separate searches:
+    one catalog query for the whole horizon, one RecommendationSession (shared busy indexes,
+    keyword scan and TF-IDF model) and one ranking, which is then grouped by week.
+    Args:
+        start_date (date): Any day of the first week (the horizon starts on its Monday).
+        weeks (int): Number of weeks to plan.
+        use_cache (bool): Serve a repeated search from RESULT_CACHE.
+        stats (PipelineStats): Collects the timings of the loading and scoring stages (optional).
+        session (RecommendationSession): The session returned by an earlier call for the same horizon.
+            It is reused (no catalog query, cached per-user data), e.g. to re-rank for a changed group.
+    Returns:
+        tuple: (RecommendationSession, dict of Monday of each week -> RankedResults
+        (use .head(n) for the best n events of that week)).
+    """
+    first_week = start_date - timedelta(days=start_date.weekday())
+    last_day = first_week + timedelta(weeks=weeks) - timedelta(days=1)
+
+    stats = stats if stats is not None else PipelineStats("horizon")
+    if session is None:
+        events_df = load_catalog_events(first_week, last_day, file_path, stats=stats)
+        session = RecommendationSession(events_df, user_busy_map, all_user_prefs, workers=workers,
+                                        availability_backend=availability_backend)
+    ranked = session.rank(selected_users, min_attendees, subgroup, use_cache, stats)
+    return session, split_results_by_week(ranked, first_week, weeks)
@@ -0,0 +1,103 @@
+import hashlib
+import pickle
+from collections import OrderedDict
+
+import database
+
+
+def make_cache_key(*parts):
+    """
+    Builds a stable digest from the parts of a search (strings, numbers and nested tuples/lists).
+    Unlike hash(), the digest is the same in every process, so it can be stored in the database.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for recommendation results:
+    - memory: an LRU of the most recent results (OrderedDict)
+    - database (optional): pickled results in the 'result_cache' table, which survive restarts
+    Every entry remembers the users it depends on, so a profile or calendar change
+    only invalidates the entries of the affected users.
+    """
+
+    def __init__(self, max_entries=32, persistent=False, max_persistent_entries=200):
+        """
+        Args:
+            max_entries (int): Number of results kept in memory.
+            persistent (bool): Also store the results in the SQLite database.
+            max_persistent_entries (int): Number of results kept in the database.
+        """
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.max_persistent_entries = max_persistent_entries
+        self._entries = OrderedDict()  # key -> (set of users, result)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the cached result for the key, or None (memory first, then the database).
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        if not self.persistent:
+            return None
+        stored = database.get_cached_result(key)
+        if stored is None:
+            return None
+        payload, users = stored
+        try:
+            result = pickle.loads(payload)
+        except Exception as e:
+            print(f"Ignoring unreadable cached result: {e}")
+            return None
+        self._remember(key, users, result)
+        return result
+
+    def put(self, key, users, result):
+        """
+        Stores a result together with the users it depends on.
+        """
+        self._remember(key, users, result)
+        if self.persistent:
+            database.save_cached_result(key, list(users), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL),
+                                        self.max_persistent_entries)
+
+    def _remember(self, key, users, result):
+        """
+        Adds an entry to the memory tier and evicts the least recently used entries.
+        """
+        self._entries[key] = (set(users), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user):
+        """
+        Drops every cached result that involves the given user (in both tiers).
+        Returns the number of dropped memory entries.
+        """
+        stale = [key for key, (users, _) in self._entries.items() if user in users]
+        for key in stale:
+            del self._entries[key]
+        if self.persistent:
+            database.delete_cached_results_for_user(user)
+        return len(stale)
+
+    def clear(self):
+        """
+        Drops all cached results (in both tiers).
+        """
+        self._entries.clear()
+        if self.persistent:
+            database.clear_result_cache()
@@ -0,0 +1,261 @@
+import hashlib
+from collections import OrderedDict, deque
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Fitted TF-IDF models per catalog version (small LRU, a few catalog versions are plenty)
+_SEMANTIC_MODELS = OrderedDict()
+SEMANTIC_MODEL_CACHE_SIZE = 8
+
+
+# --- Keyword matching (interest analysis) ---
+
+def split_preferences(prefs_string):
+    """
+    Splits a comma-separated preference string (storage format of the users table) into clean keywords.
+    """
+    if not prefs_string:
+        return []
+    return [p.strip() for p in str(prefs_string).split(',') if p.strip()]
+
+
+class PreferenceMatcher:
+    """
+    Multi-pattern keyword matcher over the preferences of a whole group (Aho-Corasick automaton).
+    It is built once per search from all distinct preference keywords, so every event text
+    is scanned a single time, no matter how many users and keywords there are.
+    Hits are mapped back to users through a keyword -> users index.
+    """
+
+    def __init__(self, user_prefs):
+        """
+        Args:
+            user_prefs (dict): Mapping of user name -> comma-separated preference string.
+        """
+        # keyword (lowercase) -> list of (user, keyword as written by that user)
+        self.keyword_users = {}
+        for user, prefs in user_prefs.items():
+            for pref in split_preferences(prefs):
+                self.keyword_users.setdefault(pref.lower(), []).append((user, pref))
+
+        self.keywords = list(self.keyword_users)
+        self._scan_cache = {}
+        self._tags_cache = {}
+        self._build_automaton()
+
+    def _build_automaton(self):
+        """
+        Builds the trie (goto function), the failure links and the output sets of the automaton.
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        # 1. Insert every keyword into the trie
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # 2. Compute the failure links breadth-first, so every state also reports
+        # the keywords that end as a suffix of its own path (e.g., 'art' inside 'party')
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_keywords(self, text):
+        """
+        Returns the set of (lowercase) keywords that occur anywhere in the text (case-insensitive substring match).
+        Results are cached per text, since recurring events share the same text.
+        """
+        text = text.lower()
+        cached = self._scan_cache.get(text)
+        if cached is not None:
+            return cached
+
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                found.add(self.keywords[keyword_id])
+
+        self._scan_cache[text] = found
+        return found
+
+    def user_tags(self, text):
+        """
+        Maps every user who likes the text to the set of their matched tags (as written by the user).
+        Results are cached per text (callers must not modify them).
+        """
+        cached = self._tags_cache.get(text)
+        if cached is not None:
+            return cached
+
+        tags = {}
+        for keyword in self.find_keywords(text):
+            for user, tag in self.keyword_users[keyword]:
+                tags.setdefault(user, set()).add(tag)
+        self._tags_cache[text] = tags
+        return tags
+
+
+# --- Semantic scoring (TF-IDF) ---
+
+class SemanticModel:
+    """
+    TF-IDF model fitted on the distinct event texts of one catalog version.
+    The event matrix is precomputed once; preference texts are transformed in a single batch,
+    so scoring many (preferences, event) pairs is one sparse row-wise dot product.
+    """
+
+    def __init__(self, documents):
+        """
+        Args:
+            documents (list): The distinct event feature texts of the catalog.
+        """
+        self.documents = list(documents)
+        self.document_index = {doc: i for i, doc in enumerate(self.documents)}
+        self.vectorizer = TfidfVectorizer(stop_words='english')
+        # Rows are L2-normalized, so the dot product of two rows is their cosine similarity
+        self.event_matrix = self.vectorizer.fit_transform(self.documents)
+
+    def similarities(self, event_features, prefs_texts):
+        """
+        Computes the cosine similarity between each event text and the preference text of the same position.
+        Duplicate preference texts are transformed only once.
+        """
+        unique_prefs, prefs_positions = np.unique(np.asarray(prefs_texts, dtype=object).astype(str), return_inverse=True)
+        prefs_matrix = self.vectorizer.transform(unique_prefs)
+
+        products = prefs_matrix[prefs_positions].multiply(self._event_vectors(event_features))
+        return np.asarray(products.sum(axis=1)).ravel()
+
+    def _event_vectors(self, event_features):
+        """
+        Looks up the precomputed vector of every event text (texts unknown to the model are transformed on the fly).
+        """
+        rows = [self.document_index.get(doc) for doc in event_features]
+        if any(row is None for row in rows):
+            return self.vectorizer.transform(list(event_features))
+        return self.event_matrix[rows]
+
+
+def catalog_version(documents):
+    """
+    Returns a stable digest of a set of event texts, used to identify a catalog version.
+    """
+    digest = hashlib.sha1()
+    for doc in sorted(set(documents)):
+        digest.update(doc.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def get_semantic_model(documents):
+    """
+    Returns the TF-IDF model for the catalog made of the given event texts.
+    The model is fitted only once per catalog version and then served from an LRU cache.
+    """
+    documents = sorted(set(documents))
+    version = catalog_version(documents)
+    model = _SEMANTIC_MODELS.get(version)
+    if model is None:
+        model = SemanticModel(documents)
+        _SEMANTIC_MODELS[version] = model
+        if len(_SEMANTIC_MODELS) > SEMANTIC_MODEL_CACHE_SIZE:
+            _SEMANTIC_MODELS.popitem(last=False)
+    else:
+        _SEMANTIC_MODELS.move_to_end(version)
+    return model
+
+
+# --- Ranking ---
+
+def top_k_indices(scores, k):
+    """
+    Returns the positions of the k highest scores, best first, using a partial selection
+    (argpartition) instead of sorting all scores. Ties keep their original order.
+    Missing (NaN) scores rank last, like -inf.
+    """
+    scores = np.asarray(scores, dtype=float)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        # The k-th best score is the threshold: take everything above it, then fill up
+        # with the tied scores in their original order
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+
+    # Sort only the selected candidates (by score descending, then by position)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+class RankedResults:
+    """
+    Scored recommendation results that are ranked lazily.
+    Only the rows that are actually requested (e.g., the next page of 10 results) are selected and sorted.
+    Supports the DataFrame operations the result pages use: len(), .empty and .head(n).
+    The timings of the pipeline run that produced the results are available as .stats.
+    """
+
+    def __init__(self, frame, scores, stats=None):
+        """
+        Args:
+            frame (DataFrame): The scored (unsorted) result rows.
+            scores (array): The ranking score of every row (higher is better).
+            stats (PipelineStats): Timings and counters of the run (optional).
+        """
+        self.frame = frame
+        self.scores = np.asarray(scores, dtype=float)
+        self.stats = stats
+        self._order = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def head(self, n=10):
+        """
+        Returns the n best rows as a DataFrame, sorted by score (best first).
+        The ranking is only extended when more rows are requested than were ranked so far.
+        """
+        n = min(n, len(self.frame))
+        if n > len(self._order):
+            if self.stats is None:
+                self._order = top_k_indices(self.scores, n)
+            else:
+                with self.stats.stage('sorting'):
+                    self._order = top_k_indices(self.scores, n)
+        return self.frame.iloc[self._order[:n]]
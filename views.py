@@ -1,6 +1,6 @@
+import os
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from streamlit_calendar import calendar
 
 # Import your modules
@@ -9,6 +9,7 @@ import auth
 import google_service
 import recommender
 import visualization
+from instrumentation import PipelineStats
 
 def show_start_page():
     """
@@ -66,6 +67,8 @@ def show_profiles_page():
                 # Call the database module to save or update user data 
                 success, operation = database.add_user(name, email, prefs)
                 if success:
+                    # The preferences changed: drop the cached results that involve this user
+                    recommender.RESULT_CACHE.invalidate_user(name)
                     if operation == "updated":
                         st.success(f"Profile for {name} updated!")
                     else:
@@ -128,15 +131,118 @@ def render_card_content(row, time_str, location, interest_score, avail_score, mi
     if st.button(f"Add '{row['Title']}' to Calendar", key=f"btn_{idx}"):
         save_callback(row, color, interest_score, location)
         
+def render_ranked_results(ranked_df, selected, key_suffix=""):
+    """
+    Renders the result cards of one ranked result set (e.g., one week) plus the 'Show more' button.
+    Args:
+        ranked_df (RankedResults): The ranked events.
+        selected (list): The names of the planning group.
+        key_suffix (str): Makes the widget keys unique when several result sets are shown on one page.
+    """
+    total_group_size = len(selected)
+
+    # Apply the current result limit of this result set (for pagination)
+    # Only the top N rows are selected and sorted, further pages are ranked on demand
+    current_limit = st.session_state.results_limit.get(key_suffix, 10)
+    visible_df = ranked_df.head(current_limit)
+
+   # Iterate through results the top N results and render cards 
+    for idx, row in visible_df.iterrows():
+        # Extract necessary scoring and location data 
+        interest_score = row.get('final_interest_score', 0)
+        avail_score = row.get('availability_score', 0)
+        location = row.get('location') # Use location from the dataframe 
+
+        # Determine categories for visual grouping/priority 
+        is_avail_perfect = (avail_score >= 0.99)
+        is_interest_high = (interest_score > 0.6)
+        is_interest_perfect = (interest_score >= 0.99)
+        
+        # Format time nicely (e.g., "Mon 14:00 - 16:00")
+        time_str = f"{row['Start'].strftime('%A, %H:%M')} - {row['End'].strftime('%H:%M')}"
+
+        # Calculate missing people for the warning text 
+        attending_count = row['attendee_count']
+        missing_people = []
+        if not is_avail_perfect:
+            # assumes 'attendees' is a comma-separated string
+            attending_list = [x.strip() for x in row['attendees'].split(',')]
+            # Find who was selected but is not in the attendee list 
+            missing_people = [p for p in selected if p not in attending_list]
+
+        # Define the Callback Function that saves the chosen event to the database 
+        def save_to_db_callback(r, col, score, loc):
+            saved = database.add_saved_event(
+                f"{r['Title']}",
+                r['Start'].strftime("%Y-%m-%dT%H:%M:%S"), # ISO format for compatability 
+                r['End'].strftime("%Y-%m-%dT%H:%M:%S"),
+                col, # color associated with the result category 
+                r['Category'],
+                r['attendees'],
+                float(score),
+                loc
+            )
+            if saved:
+                st.toast(f"Saved '{r['Title']}' permanently to Calendar!")
+            else:
+                st.toast(f"'{r['Title']}' is already saved.")
+
+        # --- Rendering based on Recommendation Quality (Gold, Green, Blue, Grey) ---
+        
+        # 1. THE JACKPOT (Gold) Perfect availability AND perfect interest match 
+        if is_avail_perfect and is_interest_perfect:
+            with st.container(border=True):
+                st.markdown(f"### 🏆 **PERFECT MATCH: {row['Title']}**")
+                st.info("Everyone is free AND it matches everyone's interests perfectly!")
+                render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#FFD700")
+        
+        # 2. TIME PERFECT (Green) - perfect availability 
+        elif is_avail_perfect:
+            with st.container(border=True):
+                st.markdown(f"### ✅ **GOOD TIMING: {row['Title']}**")
+                st.success(" Everyone is free at this time.")
+                render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#28a745")
+
+        # 3. INTEREST PERFECT (Blue) - High interest match, but some people are busy
+        elif is_interest_high:
+            with st.container(border=True):
+                st.markdown(f"### 💙 **HIGH INTEREST: {row['Title']}**")
+                st.warning(f" Only {attending_count}/{total_group_size} people are free, but they will love it!")
+                render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#1E90FF")
+
+        # 4. NORMAL (Grey) - Everything else 
+        else:
+            with st.expander(f"{row['Title']} ({attending_count}/{total_group_size} Ppl)"):
+                render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#6c757d", is_expander=True)
+    
+
+    # Check whether there are more results than currently displayed
+    if len(ranked_df) > current_limit:
+        col_b1, col_b2, col_b3 = st.columns([1, 2, 1])
+        with col_b2:
+            # 'Show more' button if there are more results 
+            if st.button("Show more events", type="primary", use_container_width=True, key=f"more_{key_suffix}"):
+                st.session_state.results_limit[key_suffix] = current_limit + 10 # increase limit by 10
+                st.rerun() # Return the script to display the new results
+
+
+def planning_window(selected_date, weeks=1):
+    """
+    Returns the Monday of the selected week and the Sunday of the last planned week.
+    """
+    start_of_week = selected_date - timedelta(days=selected_date.weekday())
+    return start_of_week, start_of_week + timedelta(weeks=weeks) - timedelta(days=1)
+
+
 def show_activity_planner():
     """
     Renders the main planning interface.
     Here users connect their calendar, select participants, set the date range and view recommandations.
     """
     st.title("Smart Group Planner")
-    # Initialize session state for limiting results 
+    # Initialize session state for limiting results (one limit per result set, e.g. per week)
     if 'results_limit' not in st.session_state:
-        st.session_state.results_limit = 10
+        st.session_state.results_limit = {}
     
     # 1. Authentication Check & Connection
     auth_result = auth.get_google_service()
@@ -155,12 +261,36 @@ def show_activity_planner():
         all_user_names = [u[0] for u in all_users_db]
         
         # 2. Fetch Calendar Data
-        # This calls the Google API to get all selected users events 
-        user_busy_map, stats = google_service.fetch_and_map_events(service, all_user_names)
+        # Only the planned weeks are needed (the week widgets below store their values in the session state).
+        # One extra day on each side covers time zone differences and events running past midnight.
+        plan_start, plan_end = planning_window(st.session_state.get('plan_date', datetime.now().date()),
+                                               st.session_state.get('plan_weeks', 1))
+        fetch_min = plan_start - timedelta(days=1)
+        fetch_max = plan_end + timedelta(days=2)
+
+        # The recommender only needs busy times, so the much smaller free/busy query can be used instead
+        # of the event details (calendars that belong to no user are skipped in that mode)
+        busy_only = st.toggle("Only load busy times (faster)", value=False,
+                              help="Uses Google's free/busy query: no event titles, and only calendars named after a user.")
+        refresh = st.button("🔄 Refresh calendar data", help="Downloads all calendars again instead of only the latest changes.")
+
+        # Otherwise this syncs the Google calendars into the local database (only the changes since the last sync
+        # are downloaded) and maps all selected users events.
+        # Reruns (clicks, paging, ...) are served from the busy-data cache until it expires or is refreshed.
+        user_busy_map, stats = google_service.load_busy_map(
+            service, all_user_names, time_min=fetch_min, time_max=fetch_max,
+            backend="freebusy" if busy_only else "events", refresh=refresh
+        )
         
         # Diagnostic box to help users debug why events might be missing
         with st.expander(" Diagnostic: Google Calendar Events", expanded=False):
+            st.write(f"Last synced: {stats['synced_at'].strftime('%d.%m.%Y %H:%M:%S')}"
+                     f"{' (cached)' if stats.get('from_cache') else ''}")
             st.write(f"Google found {stats.get('total_events', 0)} events.")
+            st.write(f"Synced {stats.get('changed_events', 0)} changed events "
+                     f"({stats.get('full_syncs', 0)} calendars fully resynced).")
+            if stats.get('errors'):
+                st.write(f"Errors: {stats['errors']}")
             if stats.get('unassigned_titles'):
                 st.write(f"Ignored: {stats['unassigned_titles']}")
 
@@ -179,146 +309,143 @@ def show_activity_planner():
             user_names = [u[0] for u in all_users_data]
             # Multi-select for choosing who is part of the planning group 
             selected = st.multiselect("Who is planning?", user_names, default=user_names)
+            # Minimum group size, e.g. "any 4 of these 12 people"
+            min_attendees = st.number_input("Minimum number of attendees", min_value=1,
+                                            max_value=max(1, len(selected)), value=1)
+            best_subgroup = st.checkbox("Only invite the most interested subgroup",
+                                        help="Instead of everybody who is free, pick the people who like the event best.")
         
         with col2:
             # Date input to select the target week
-            selected_date = st.date_input("Plan for which week?", value=today)
-            # Calculate the Monday and Sunday of the selected week 
-            start_of_week = selected_date - timedelta(days=selected_date.weekday())
-            end_of_week = start_of_week + timedelta(days=6)
+            selected_date = st.date_input("Plan for which week?", value=today, key="plan_date")
+            # Several weeks can be planned at once (one result tab per week)
+            weeks = int(st.number_input("How many weeks?", min_value=1, max_value=8, value=1, key="plan_weeks"))
+            # Calculate the Monday of the selected week and the Sunday of the last planned week
+            start_of_week, end_of_week = planning_window(selected_date, weeks)
             st.caption(f"Showing events for: **{start_of_week.strftime('%d.%m.%Y')} - {end_of_week.strftime('%d.%m.%Y')}**")
         # Match user names to their interest preferences 
         user_prefs_dict = {u[0]: u[1] for u in all_users_data}
 
         # 4. Run Analysis Trigger 
         if st.button("Search Events") and selected:
-            # Reset the display limit to 10 on a new search 
-            st.session_state.results_limit = 10
-            
-            # Load local events database 
-            events_df = recommender.load_local_events("events.csv") 
-            # Fallback to load from (Excel file) XLSX if CVS fails 
-            if events_df.empty:
-                 events_df = recommender.load_local_events("events.xlsx")
+            # Reset the display limits to 10 on a new search 
+            st.session_state.results_limit = {}
             
-            # Filter events to match the users selected week 
-            if not events_df.empty:
-                events_df['Start'] = pd.to_datetime(events_df['Start'])
-                mask = (events_df['Start'].dt.date >= start_of_week) & (events_df['Start'].dt.date <= end_of_week)
-                events_df_filtered = events_df.loc[mask].copy()
-            else:
-                events_df_filtered = events_df
+            # Time every stage of the search (shown in the diagnostics box below)
+            search_stats = PipelineStats("search")
+            # Plan all selected weeks in one pass: the events of the whole horizon are loaded from the
+            # catalog database in one query (imported from the CSV file if present, otherwise from the Excel file),
+            # scored by one recommendation session and grouped by week.
+            # The session caches every user's availability and keyword hits (and fits the TF-IDF model once),
+            # so changing the group later is cheap; the ranking is lazy (each results page only selects the rows it shows)
+            catalog_file = "events.csv" if os.path.exists("events.csv") else "events.xlsx"
+            st.session_state.planned_weeks = (start_of_week, weeks)
+            st.session_state.recommendation_session, st.session_state.ranked_results = recommender.plan_horizon(
+                user_busy_map,
+                selected,
+                user_prefs_dict,
+                start_of_week,
+                weeks=weeks,
+                file_path=catalog_file,
+                min_attendees=int(min_attendees),
+                subgroup=best_subgroup,
+                stats=search_stats
+            )
+            st.session_state.ranked_group = (list(selected), int(min_attendees), best_subgroup)
+            st.session_state.pipeline_stats = search_stats
+            search_stats.log()
 
-            # Call the Recommender Engine to score potential events 
-            st.session_state.ranked_results = recommender.find_best_slots_for_group(
-                events_df_filtered, 
-                user_busy_map, 
-                selected, 
+        # Re-rank instantly from the cached session when people are added to or removed from the group
+        # (or the group size settings change)
+        elif (st.session_state.get('recommendation_session') is not None
+              and st.session_state.ranked_results is not None
+              and selected and (list(selected), int(min_attendees), best_subgroup) != st.session_state.get('ranked_group')):
+            st.session_state.results_limit = {}
+            rerank_stats = PipelineStats("rerank")
+            planned_start, planned_weeks = st.session_state.planned_weeks
+            _, st.session_state.ranked_results = recommender.plan_horizon(
+                user_busy_map,
+                selected,
                 user_prefs_dict,
-                min_attendees=1 
+                planned_start,
+                weeks=planned_weeks,
+                min_attendees=int(min_attendees),
+                subgroup=best_subgroup,
+                stats=rerank_stats,
+                session=st.session_state.recommendation_session
             )
+            st.session_state.ranked_group = (list(selected), int(min_attendees), best_subgroup)
+            st.session_state.pipeline_stats = rerank_stats
+            rerank_stats.log()
 
         # 5. Display Results
         if st.session_state.ranked_results is not None:
-            ranked_df = st.session_state.ranked_results
+            # Results are stored per week (Monday -> ranked events)
+            ranked_by_week = st.session_state.ranked_results
             
-            if not ranked_df.empty:
+            if any(not ranked_df.empty for ranked_df in ranked_by_week.values()):
                 st.subheader("🎯 Event Suggestions")
                 # Button to clear the current results 
                 if st.button("Clear Results"):
                     st.session_state.ranked_results = None
+                    st.session_state.recommendation_session = None
                     st.rerun()
                 
                 st.markdown("---")
                 
-                total_group_size = len(selected)
-
-                # Apply the current result limit (for pagination)
-                current_limit = st.session_state.results_limit
-                visible_df = ranked_df.head(current_limit)
-
-               # Iterate through results the top N results and render cards 
-                for idx, row in visible_df.iterrows():
-                    # Extract necessary scoring and location data 
-                    interest_score = row.get('final_interest_score', 0)
-                    avail_score = row.get('availability_score', 0)
-                    location = row.get('location') # Use location from the dataframe 
-
-                    # Determine categories for visual grouping/priority 
-                    is_avail_perfect = (avail_score >= 0.99)
-                    is_interest_high = (interest_score > 0.6)
-                    is_interest_perfect = (interest_score >= 0.99)
-                    
-                    # Format time nicely (e.g., "Mon 14:00 - 16:00")
-                    time_str = f"{row['Start'].strftime('%A, %H:%M')} - {row['End'].strftime('%H:%M')}"
-
-                    # Calculate missing people for the warning text 
-                    attending_count = row['attendee_count']
-                    missing_people = []
-                    if not is_avail_perfect:
-                        # assumes 'attendees' is a comma-separated string
-                        attending_list = [x.strip() for x in row['attendees'].split(',')]
-                        # Find who was selected but is not in the attendee list 
-                        missing_people = [p for p in selected if p not in attending_list]
-
-                    # Define the Callback Function that saves the chosen event to the database 
-                    def save_to_db_callback(r, col, score, loc):
-                        saved = database.add_saved_event(
-                            f"{r['Title']}",
-                            r['Start'].strftime("%Y-%m-%dT%H:%M:%S"), # ISO format for compatability 
-                            r['End'].strftime("%Y-%m-%dT%H:%M:%S"),
-                            col, # color associated with the result category 
-                            r['Category'],
-                            r['attendees'],
-                            float(score),
-                            loc
-                        )
-                        if saved:
-                            st.toast(f"Saved '{r['Title']}' permanently to Calendar!")
-                        else:
-                            st.toast(f"'{r['Title']}' is already saved.")
-
-                    # --- Rendering based on Recommendation Quality (Gold, Green, Blue, Grey) ---
-                    
-                    # 1. THE JACKPOT (Gold) Perfect availability AND perfect interest match 
-                    if is_avail_perfect and is_interest_perfect:
-                        with st.container(border=True):
-                            st.markdown(f"### 🏆 **PERFECT MATCH: {row['Title']}**")
-                            st.info("Everyone is free AND it matches everyone's interests perfectly!")
-                            render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#FFD700")
-                    
-                    # 2. TIME PERFECT (Green) - perfect availability 
-                    elif is_avail_perfect:
-                        with st.container(border=True):
-                            st.markdown(f"### ✅ **GOOD TIMING: {row['Title']}**")
-                            st.success(" Everyone is free at this time.")
-                            render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#28a745")
-
-                    # 3. INTEREST PERFECT (Blue) - High interest match, but some people are busy
-                    elif is_interest_high:
-                        with st.container(border=True):
-                            st.markdown(f"### 💙 **HIGH INTEREST: {row['Title']}**")
-                            st.warning(f" Only {attending_count}/{total_group_size} people are free, but they will love it!")
-                            render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#1E90FF")
-
-                    # 4. NORMAL (Grey) - Everything else 
-                    else:
-                        with st.expander(f"{row['Title']} ({attending_count}/{total_group_size} Ppl)"):
-                            render_card_content(row, time_str, location, interest_score, avail_score, missing_people, idx, save_to_db_callback, "#6c757d", is_expander=True)
-                
-
-                # Check whether there are more results than currently displayed
-                if len(ranked_df) > current_limit:
-                    col_b1, col_b2, col_b3 = st.columns([1, 2, 1])
-                    with col_b2:
-                        # 'Show more' button if there are more results 
-                        if st.button("Show more events", type="primary", use_container_width=True):
-                            st.session_state.results_limit += 10 # increase limit by 10
-                            st.rerun() # Return the script to display the new results
+                # One result set per planned week (tabs if several weeks are planned)
+                week_starts = list(ranked_by_week)
+                if len(week_starts) == 1:
+                    render_ranked_results(ranked_by_week[week_starts[0]], selected, key_suffix=week_starts[0].isoformat())
+                else:
+                    tabs = st.tabs([f"Week of {week.strftime('%d.%m.')} ({len(ranked_by_week[week])})" for week in week_starts])
+                    for tab, week in zip(tabs, week_starts):
+                        with tab:
+                            if ranked_by_week[week].empty:
+                                st.info("No suitable events found for this week.")
+                            else:
+                                render_ranked_results(ranked_by_week[week], selected, key_suffix=week.isoformat())
 
             else:
                 st.warning("No suitable events found.")
 
+            # Diagnostic box showing where the time of the last search went
+            # (the 'sorting' stage grows while more result pages are shown)
+            pipeline_stats = st.session_state.get('pipeline_stats')
+            if pipeline_stats is not None:
+                with st.expander(" Diagnostic: Search Performance", expanded=False):
+                    st.write(f"Total: {pipeline_stats.total_seconds * 1000:.1f} ms ({pipeline_stats.name})")
+                    st.table({
+                        "Stage": list(pipeline_stats.timings),
+                        "Time (ms)": [round(seconds * 1000, 2) for seconds in pipeline_stats.timings.values()],
+                    })
+                    if pipeline_stats.counters:
+                        st.write(pipeline_stats.counters)
+
+        # 6. Suggested Free Time Slots (open-ended planning, independent of the event catalog)
+        if selected and user_busy_map:
+            st.markdown("---")
+            st.subheader("🕒 When is the group free?")
+            min_free = st.number_input("At least how many people should be free?", min_value=1,
+                                       max_value=len(selected), value=len(selected))
+            # Only suggest slots of at least one hour during the day (08:00 - 23:00)
+            free_windows = recommender.find_common_free_windows(
+                user_busy_map,
+                selected,
+                start_of_week,
+                end_of_week,
+                min_free=int(min_free),
+                daily_hours=(time(8, 0), time(23, 0))
+            )
+            if free_windows:
+                for slot in free_windows:
+                    slot_str = f"{slot['start'].strftime('%A %d.%m., %H:%M')} - {slot['end'].strftime('%H:%M')}"
+                    # Who is free may change within a window, only the listed people are free for all of it
+                    always_free = f": {', '.join(slot['free_users'])}" if slot['free_users'] else ""
+                    st.write(f"**{slot_str}** (at least {slot['free_count']}/{len(selected)} free){always_free}")
+            else:
+                st.info("No common free time found for the selected weeks.")
+
 def show_group_calendar():
     """
     Renders the visual calendar using streamlit-calender, it combines:
@@ -334,8 +461,19 @@ def show_group_calendar():
         all_users_db = database.get_all_users()
         all_user_names = [u[0] for u in all_users_db]
 
-        # Fetch private events from Google Calender 
-        user_busy_map, stats = google_service.fetch_and_map_events(service, all_user_names)
+        # Only the month shown in the calendar is loaded (plus the days of the neighbouring months in its grid).
+        # The month is chosen with this widget; the calendar's own navigation is hidden, because the
+        # calendar component doesn't report when its visible range changes.
+        selected_month = st.date_input("Show month", value=datetime.now().date(), key="calendar_month")
+        month_start = selected_month.replace(day=1)
+        range_start, range_end = month_start - timedelta(days=7), month_start + timedelta(days=42)
+
+        # Fetch private events from Google Calender (incremental sync, see google_service.sync_and_map_events)
+        # Reruns (e.g., switching the chart type) are served from the busy-data cache
+        refresh = st.button("🔄 Refresh calendar data", help="Downloads all calendars again instead of only the latest changes.")
+        user_busy_map, stats = google_service.load_busy_map(service, all_user_names, time_min=range_start,
+                                                            time_max=range_end, refresh=refresh)
+        st.caption(f"Last synced: {stats['synced_at'].strftime('%d.%m.%Y %H:%M:%S')}")
         
         cal_events = [] # List for full calender (streamlit-calender) events 
         visualization_data = [] # List for data required by the visualization module 
@@ -345,6 +483,7 @@ def show_group_calendar():
         # 1. Add Private Google Events
         for i, (user_name, events) in enumerate(user_busy_map.items()):
             color = colors[i % len(colors)]
+            # The compact BusySlots container yields one {'summary', 'start', 'end'} dictionary per event
             for event in events:
                 # Format event for full calender/ streamlit-calender 
                 cal_events.append({
@@ -376,72 +515,75 @@ def show_group_calendar():
                 database.clear_saved_events()
                 st.rerun()
 
-        if cal_events:
-            # Render Calendar with Click Callback
-            calendar_return = calendar(
-                events=cal_events, 
-                options={"initialView": "dayGridMonth", "height": 700}, # display as month view initially 
-                callbacks=["eventClick"] # Enable event click listener 
-            )
+        if not cal_events:
+            st.info("No events found for this month.")
+
+        # Render Calendar with Click Callback (also without events, so another month can still be chosen)
+        calendar_return = calendar(
+            events=cal_events, 
+            # display the selected month (the key changes with the month, so the calendar jumps to it)
+            options={"initialView": "dayGridMonth", "height": 700, "initialDate": month_start.isoformat(),
+                     "headerToolbar": {"left": "", "center": "title", "right": ""}},
+            callbacks=["eventClick"], # Enable event click listener 
+            key=f"group_calendar_{month_start.isoformat()}"
+        )
+
+        # Handle Clicks (Show event details popup)
+        if calendar_return and "eventClick" in calendar_return:
+            clicked_event = calendar_return["eventClick"]["event"]
+            props = clicked_event.get("extendedProps", {})
             
-            # Handle Clicks (Show event details popup)
-            if calendar_return and "eventClick" in calendar_return:
-                clicked_event = calendar_return["eventClick"]["event"]
-                props = clicked_event.get("extendedProps", {})
+            st.markdown("### Event Details")
+            with st.container(border=True):
+                st.markdown(f"## {clicked_event['title']}")
                 
-                st.markdown("### Event Details")
-                with st.container(border=True):
-                    st.markdown(f"## {clicked_event['title']}")
-                    
-                    c1, c2 = st.columns(2)
-                    
-                    # Parse ISO time to readable format
-                    raw_start = clicked_event.get('start', '')
-                    raw_end = clicked_event.get('end', '')
-                    try:
-                        # Attempt to parse ISO format datetimes 
-                        if "T" in raw_start:
-                            s_dt = datetime.fromisoformat(raw_start)
-                            e_dt = datetime.fromisoformat(raw_end)
-                            if s_dt.date() == e_dt.date():
-                                time_display = f"{s_dt.strftime('%A, %d.%m.')} | {s_dt.strftime('%H:%M')} - {e_dt.strftime('%H:%M')}"
-                            else:
-                                time_display = f"{s_dt.strftime('%a %H:%M')} - {e_dt.strftime('%a %H:%M')}"
+                c1, c2 = st.columns(2)
+                
+                # Parse ISO time to readable format
+                raw_start = clicked_event.get('start', '')
+                raw_end = clicked_event.get('end', '')
+                try:
+                    # Attempt to parse ISO format datetimes 
+                    if "T" in raw_start:
+                        s_dt = datetime.fromisoformat(raw_start)
+                        e_dt = datetime.fromisoformat(raw_end)
+                        if s_dt.date() == e_dt.date():
+                            time_display = f"{s_dt.strftime('%A, %d.%m.')} | {s_dt.strftime('%H:%M')} - {e_dt.strftime('%H:%M')}"
                         else:
-                            time_display = f"{raw_start} (All Day)"
-                    except:
-                        # Fallback for unexpected date formats 
-                        time_display = f"{raw_start} - {raw_end}"
-                    
-                    c1.write(f" **Time:** {time_display}")
-            
-                    # Location display 
-                    loc = props.get('location', '-')
-                    if loc and loc != "TBD":
-                         c1.write(f"📍 **Location:** {loc}")
-                    
-                    # Display extra info if available (Group Event) vs (Google Event)
-                    if "category" in props and props.get("type") != "google":
-                        # Details for events saved via the recommender 
-                        c1.info(f"**Category:** {props.get('category', 'General')}")
-                        c2.write(f"👥 **Attendees:** {props.get('attendees', 'Unknown')}")
-                        score_val = props.get('match_score')
-                        if score_val is not None:
-                            c2.write(f" **Interest Score:** {int(float(score_val)*100)}%")
+                            time_display = f"{s_dt.strftime('%a %H:%M')} - {e_dt.strftime('%a %H:%M')}"
                     else:
-                        # Details for private Google Calender events 
-                        title = clicked_event['title']
-                        if ":" in title:
-                            person = title.split(":")[0]
-                            c2.write(f"👤 **Person:** {person}")
-                        else:
-                            c2.write("👤 **Type:** Private Calendar Entry")
-            
-            st.markdown("---")
-            # Render Charts based on the private events data
-            # This shows the user who is busy and when 
-            visualization.show_visualizations(visualization_data)
-        else:
-            st.info("No events found.")
+                        time_display = f"{raw_start} (All Day)"
+                except:
+                    # Fallback for unexpected date formats 
+                    time_display = f"{raw_start} - {raw_end}"
+                
+                c1.write(f" **Time:** {time_display}")
+        
+                # Location display 
+                loc = props.get('location', '-')
+                if loc and loc != "TBD":
+                     c1.write(f"📍 **Location:** {loc}")
+                
+                # Display extra info if available (Group Event) vs (Google Event)
+                if "category" in props and props.get("type") != "google":
+                    # Details for events saved via the recommender 
+                    c1.info(f"**Category:** {props.get('category', 'General')}")
+                    c2.write(f"👥 **Attendees:** {props.get('attendees', 'Unknown')}")
+                    score_val = props.get('match_score')
+                    if score_val is not None:
+                        c2.write(f" **Interest Score:** {int(float(score_val)*100)}%")
+                else:
+                    # Details for private Google Calender events 
+                    title = clicked_event['title']
+                    if ":" in title:
+                        person = title.split(":")[0]
+                        c2.write(f"👤 **Person:** {person}")
+                    else:
+                        c2.write("👤 **Type:** Private Calendar Entry")
+        
+        st.markdown("---")
+        # Render Charts based on the private events data
+        # This shows the user who is busy and when 
+        visualization.show_visualizations(visualization_data)
     else:
         st.warning("Please connect first in the 'Activity Planner'.")